@@ -0,0 +1,62 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .invalidation import aget_versions, get_versions
+from .routers import primary
+
+
+def build_key(name: str, parts: Iterable, versions: Iterable) -> str:
+    """
+    Части ключа и версии хэшируются,
+    чтобы длина не упиралась в лимиты Memcached.
+    """
+    raw = ":".join(map(str, [*parts, *versions]))
+    return f"{name}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+
+def make_key(name: str, *parts: Any, scopes: Iterable[str] = ()) -> str:
+    """Ключ кэша, зависящий от версий областей инвалидации."""
+    return build_key(name, parts, get_versions(scopes))
+
+
+async def amake_key(name: str, *parts: Any, scopes: Iterable[str] = ()) -> str:
+    return build_key(name, parts, await aget_versions(scopes))
+
+
+def cached(
+    name: str,
+    parts: Iterable,
+    default: Callable[[], Any],
+    scopes: Iterable[str] = (),
+) -> Any:
+    """
+    Берёт значение из кэша или вычисляет и сохраняет его.
+    Значение читается из основной БД: отставшая реплика
+    не должна попасть в кэш под новой версией.
+    """
+    key = make_key(name, *parts, scopes=scopes)
+    value = cache.get(key)
+    if value is None:
+        with primary():
+            value = default()
+        cache.set(key, value, settings.PUBLIC_CACHE_TIMEOUT)
+    return value
+
+
+async def acached(
+    name: str,
+    parts: Iterable,
+    default: Callable[[], Awaitable[Any]],
+    scopes: Iterable[str] = (),
+) -> Any:
+    """Асинхронный cached: default — корутинная функция (async ORM)."""
+    key = await amake_key(name, *parts, scopes=scopes)
+    value = await cache.aget(key)
+    if value is None:
+        with primary():
+            value = await default()
+        await cache.aset(key, value, settings.PUBLIC_CACHE_TIMEOUT)
+    return value
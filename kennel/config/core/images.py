@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Расширение файла -> формат Pillow
+THUMBNAIL_FORMATS = {
+    "webp": "WEBP",
+    "jpg": "JPEG",
+}
+
+# Ширины готовых миниатюр фото: пишет generate_thumbnails, читает srcset —
+# страница не обращается к хранилищу (в S3 это запрос по сети на каждое фото).
+WIDTHS_KEY = "thumbnails:{name}"
+# Пустой список хранится недолго: миниатюры могла создать задача
+# в другом процессе с локальным кэшем.
+MISSING_WIDTHS_TIMEOUT = 60
+
+
+def thumbnail_name(name: str, width: int, ext: str) -> str:
+    """dogs/Bella.jpg -> dogs/Bella_400w.webp (рядом с оригиналом)."""
+    root, _ = os.path.splitext(name)
+    return f"{root}_{width}w.{ext}"
+
+
+def thumbnail_names(name: str) -> list[str]:
+    return [
+        thumbnail_name(name, width, ext)
+        for width in settings.THUMBNAIL_WIDTHS
+        for ext in THUMBNAIL_FORMATS
+    ]
+
+
+def has_width(name: str, width: int) -> bool:
+    """Миниатюра ширины width сохранена во всех форматах."""
+    last_ext = list(THUMBNAIL_FORMATS)[-1]
+    return default_storage.exists(thumbnail_name(name, width, last_ext))
+
+
+def has_thumbnails(name: str) -> bool:
+    """Проверяем по самой маленькой миниатюре — она сохраняется последней."""
+    return has_width(name, min(settings.THUMBNAIL_WIDTHS))
+
+
+def widths_key(name: str) -> str:
+    return WIDTHS_KEY.format(name=hashlib.md5(name.encode()).hexdigest())
+
+
+def find_thumbnail_widths(name: str) -> list[int]:
+    """
+    Ширины готовых миниатюр по хранилищу, пустой список — пока их нет.
+    Ширины больше оригинала не создаются, поэтому готовые — все ширины
+    до самой большой существующей.
+    """
+    if not has_thumbnails(name):
+        return []
+    widths = sorted(settings.THUMBNAIL_WIDTHS)
+    while len(widths) > 1 and not has_width(name, widths[-1]):
+        widths.pop()
+    return widths
+
+
+def remember_widths(name: str, widths: list[int]) -> None:
+    cache.set(widths_key(name), widths, None if widths else MISSING_WIDTHS_TIMEOUT)
+
+
+def thumbnail_widths(name: str) -> list[int]:
+    """
+    Ширины готовых миниатюр из кэша. Хранилище проверяется, только
+    если ключа нет (вытеснен или фото загружено до появления ключа).
+    """
+    widths = cache.get(widths_key(name))
+    if widths is None:
+        widths = find_thumbnail_widths(name)
+        remember_widths(name, widths)
+    return widths
+
+
+def generate_thumbnails(name: str) -> list[str]:
+    """
+    Создаёт миниатюры фото для всех ширин и форматов.
+    Фото уже проверено валидаторами, но битый файл не должен ронять запрос.
+    """
+    try:
+        with default_storage.open(name) as file:
+            image = ImageOps.exif_transpose(Image.open(file))
+            image.load()
+    except (FileNotFoundError, UnidentifiedImageError, OSError):
+        logger.warning(f"Не удалось открыть фото {name} для миниатюр.")
+        return []
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    # Ширины больше оригинала пропускаются: srcset не должен обещать
+    # браузеру больше пикселей, чем есть. Самая маленькая создаётся всегда
+    # (у маленького фото — в исходном размере) и последней — по ней
+    # has_thumbnails узнаёт, что миниатюры готовы.
+    widths = sorted(settings.THUMBNAIL_WIDTHS, reverse=True)
+    widths = [width for width in widths[:-1] if width <= image.width] + widths[-1:]
+    for width in set(settings.THUMBNAIL_WIDTHS) - set(widths):
+        for ext in THUMBNAIL_FORMATS:
+            default_storage.delete(thumbnail_name(name, width, ext))
+    saved = []
+    for width in widths:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+        for ext, image_format in THUMBNAIL_FORMATS.items():
+            if image_format == "JPEG" and thumbnail.mode != "RGB":
+                thumbnail = thumbnail.convert("RGB")
+            buffer = BytesIO()
+            thumbnail.save(
+                buffer,
+                image_format,
+                quality=settings.THUMBNAIL_QUALITY,
+                optimize=True,
+            )
+            thumb_name = thumbnail_name(name, width, ext)
+            if default_storage.exists(thumb_name):
+                default_storage.delete(thumb_name)
+            saved.append(
+                default_storage.save(thumb_name, ContentFile(buffer.getvalue()))
+            )
+    remember_widths(name, sorted(widths))
+    return saved
+
+
+def ensure_thumbnails(name: str) -> None:
+    """Фоновая задача: миниатюры для нового фото."""
+    if not has_thumbnails(name):
+        generate_thumbnails(name)
+
+
+def delete_thumbnails(name: str) -> None:
+    cache.delete(widths_key(name))
+    for thumb_name in thumbnail_names(name):
+        if default_storage.exists(thumb_name):
+            default_storage.delete(thumb_name)
+
+
+def delete_image(name: str) -> None:
+    """Фоновая задача: удаляет фото вместе с миниатюрами."""
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    delete_thumbnails(name)
+
+
+def srcset(name: str, ext: str = "webp") -> str:
+    """
+    Значение атрибута srcset для миниатюр фото.
+    Пустое, пока фоновая задача не создала миниатюры: браузер берёт src.
+    """
+    if not name:
+        return ""
+    name = str(name)
+    return ", ".join(
+        f"{settings.MEDIA_URL}{thumbnail_name(name, width, ext)} {width}w"
+        for width in thumbnail_widths(name)
+    )
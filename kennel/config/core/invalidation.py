@@ -0,0 +1,56 @@
+import time
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import models
+
+VERSION_KEY = "version:{scope}"
+
+
+def scope(model: type[models.Model], **lookup) -> str:
+    """
+    Область инвалидации: вся модель или её часть.
+    scope(Dog) -> "dogs.dog", scope(Dog, breed=5) -> "dogs.dog:breed=5".
+    """
+    label = model._meta.label_lower
+    if not lookup:
+        return label
+    return f"{label}:" + ",".join(f"{k}={v}" for k, v in sorted(lookup.items()))
+
+
+def get_versions(scopes: Iterable[str]) -> list[int]:
+    """
+    Текущие счётчики версий областей (один запрос к кэшу).
+    Отсутствующий счётчик начинается с текущего времени в нс, чтобы после
+    вытеснения из кэша не «воскресить» старые записи.
+    """
+    keys = [VERSION_KEY.format(scope=s) for s in scopes]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        versions.update(cache.get_many(missing))
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(scopes: Iterable[str]) -> list[int]:
+    """Асинхронная версия get_versions для async-представлений."""
+    keys = [VERSION_KEY.format(scope=s) for s in scopes]
+    versions = await cache.aget_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            await cache.aadd(key, time.time_ns(), None)
+        versions.update(await cache.aget_many(missing))
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes: str) -> None:
+    """Увеличивает версии областей: все ключи, построенные на них, устаревают."""
+    for s in scopes:
+        key = VERSION_KEY.format(scope=s)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
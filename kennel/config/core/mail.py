@@ -0,0 +1,179 @@
+import atexit
+import logging
+import queue
+import re
+import smtplib
+import threading
+from functools import cache
+from html import unescape
+
+from django.conf import settings
+from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+
+logger = logging.getLogger(__name__)
+
+LINK_RE = re.compile(r"<a\s[^>]*href=\"([^\"]+)\"[^>]*>(.*?)</a>", re.S | re.I)
+BLOCK_END_RE = re.compile(r"</(?:p|h\d|div|li|tr)>|<br\s*/?>", re.I)
+
+
+@cache
+def get_mail_template(template_name: str):
+    """Скомпилированный шаблон письма, один раз на процесс."""
+    return get_template(template_name)
+
+
+def html_to_text(html: str) -> str:
+    """Текстовая версия письма: абзацы по блочным тегам, ссылки как «текст (url)»."""
+    html = LINK_RE.sub(r"\2 (\1)", html)
+    blocks = BLOCK_END_RE.sub("\n\n", html).split("\n\n")
+    lines = (" ".join(unescape(strip_tags(block)).split()) for block in blocks)
+    return "\n\n".join(line for line in lines if line)
+
+
+def build_mail(
+    template_name: str, context: dict, subject: str, to: list[str]
+) -> EmailMultiAlternatives:
+    """Письмо из шаблона: HTML и автоматическая текстовая версия."""
+    html = get_mail_template(template_name).render(
+        {"site_url": settings.SITE_URL, **context}
+    )
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=html_to_text(html),
+        from_email=settings.EMAIL_HOST_USER,
+        to=to,
+    )
+    email.attach_alternative(html, "text/html")
+    return email
+
+
+def is_permanent(error: Exception) -> bool:
+    """Ошибка письма, которую повтор не исправит: адрес отклонён с кодом 5xx."""
+    if isinstance(error, ValueError):
+        # Некорректный адрес или заголовок.
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, (smtplib.SMTPSenderRefused, smtplib.SMTPDataError)):
+        return error.smtp_code >= 500
+    return False
+
+
+class MailQueue:
+    """
+    Очередь исходящих писем.
+    Фоновый поток собирает письма в пакеты и отправляет каждый пакет
+    через одно SMTP-соединение. Письма, не отправленные из-за временного
+    сбоя, возвращаются в очередь по таймеру с растущей задержкой —
+    поток и запрос не ждут повтора.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.worker = None
+        self.timers = set()
+
+    def put(self, message: EmailMessage, attempt: int = 0) -> None:
+        if not settings.MAIL_QUEUE_ASYNC:
+            for failed in self.send_batch([message]):
+                self.retry(failed, attempt)
+            return
+        self.queue.put((message, attempt))
+        self.ensure_worker()
+
+    def ensure_worker(self) -> None:
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(
+                    target=self.run, name="kennel-mail", daemon=True
+                )
+                self.worker.start()
+
+    def next_batch(self) -> list[tuple[EmailMessage, int]]:
+        """Ждёт первое письмо, затем добирает пакет, пока письма идут подряд."""
+        batch = [self.queue.get()]
+        while len(batch) < settings.MAIL_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get(timeout=settings.MAIL_BATCH_WAIT))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self) -> None:
+        while True:
+            batch = self.next_batch()
+            try:
+                attempts = {id(message): attempt for message, attempt in batch}
+                for failed in self.send_batch([message for message, _ in batch]):
+                    self.retry(failed, attempts[id(failed)])
+            except Exception:
+                logger.exception("Сбой очереди писем.")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def retry(self, message: EmailMessage, attempt: int) -> None:
+        """Повторяет письмо через MAIL_RETRY_DELAY * 2**attempt секунд."""
+        if attempt >= settings.MAIL_MAX_RETRIES:
+            logger.error(f"Не удалось отправить письмо: {', '.join(message.to)}")
+            return
+
+        def requeue():
+            self.put(message, attempt + 1)
+            with self.lock:
+                self.timers.discard(timer)
+
+        timer = threading.Timer(settings.MAIL_RETRY_DELAY * 2**attempt, requeue)
+        timer.daemon = True
+        with self.lock:
+            self.timers.add(timer)
+        timer.start()
+
+    @staticmethod
+    def send_batch(messages: list[EmailMessage]) -> list[EmailMessage]:
+        """
+        Отправляет пакет через одно соединение, по письму за раз.
+        Постоянная ошибка снимает только своё письмо; при временном сбое
+        возвращает неотправленные письма для повтора.
+        """
+        pending = list(messages)
+        try:
+            with get_connection() as connection:
+                while pending:
+                    try:
+                        connection.send_messages(pending[:1])
+                    except Exception as error:
+                        if not is_permanent(error):
+                            raise
+                        logger.error(
+                            f"Письмо {', '.join(pending[0].to)} отклонено: {error}"
+                        )
+                    pending.pop(0)
+        except Exception:
+            logger.warning(f"Сбой SMTP, повтор {len(pending)} писем.", exc_info=True)
+        return pending
+
+    def flush(self) -> None:
+        """Ждёт отправки всех писем из очереди, включая отложенные повторы."""
+        while True:
+            if self.worker is not None and self.worker.is_alive():
+                self.queue.join()
+            with self.lock:
+                timers = list(self.timers)
+            if not timers:
+                return
+            for timer in timers:
+                timer.join()
+
+
+mail_queue = MailQueue()
+atexit.register(mail_queue.flush)
+
+
+def send_queued(message: EmailMessage) -> None:
+    """Ставит письмо в очередь после коммита транзакции."""
+    transaction.on_commit(lambda: mail_queue.put(message))
@@ -2,6 +2,14 @@ from django.http import HttpResponse
 from django.shortcuts import render
 from django.http import HttpResponseForbidden
 
+from .routers import pin_primary
+from .pagination import (
+    DEFAULT_ORDERING,
+    aget_keyset_page,
+    get_keyset_page,
+    is_htmx_fragment,
+)
+
 
 class HtmxRedirectMixin:
     def render_htmx_redirect(self):
@@ -16,14 +24,113 @@ class HtmxRedirectMixin:
         return response
 
 
+class PinPrimaryAfterWriteMixin:
+    """После успешной записи пользователь читает из основной БД."""
+
+    def form_valid(self, form):
+        return pin_primary(super().form_valid(form))
+
+
 class IsOwnerOrAdminRequiredMixin:
+    """
+    Доступ к объекту только владельцу и персоналу.
+    Объект читается один раз за запрос (get_object запоминается
+    на представлении), владелец сравнивается по owner_id без загрузки.
+    """
+
+    owner_field = "owner"
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, "_object"):
+            self._object = super().get_object()
+        return self._object
+
+    def has_object_permission(self, obj):
+        user = self.request.user
+        owner_id = getattr(obj, f"{self.owner_field}_id")
+        return user.is_staff or (user.is_authenticated and owner_id == user.pk)
+
+    def permission_denied(self):
+        if self.request.headers.get("HX-Request"):
+            response = render(self.request, "modals/403.html")
+            response["HX-Retarget"] = "#modals-container"
+            response["HX-Reswap"] = "innerHTML"
+            return response
+        return HttpResponseForbidden()
+
     def dispatch(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if not (request.user == obj.owner or request.user.is_staff):
-            if request.headers.get("HX-Request"):
-                response = render(request, "modals/403.html")
-                response["HX-Retarget"] = "#modals-container"
-                response["HX-Reswap"] = "innerHTML"
-                return response
-            return HttpResponseForbidden()
+        if not self.has_object_permission(self.get_object()):
+            return self.permission_denied()
         return super().dispatch(request, *args, **kwargs)
+
+
+class OwnerQuerysetMixin:
+    """
+    Проверка владельца в самом запросе: не-персонал видит только свои
+    объекты (WHERE owner_id = ? по индексу), чужой объект — 404.
+    """
+
+    owner_field = "owner"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_staff:
+            return queryset
+        return queryset.filter(**{f"{self.owner_field}_id": user.pk})
+
+
+async def aload_user(request):
+    """
+    Загружает пользователя до рендера шаблона.
+    В async-представлении ленивый request.user нельзя вычислять в шаблоне:
+    это синхронный запрос к БД.
+    """
+    request.user = await request.auser()
+    return request.user
+
+
+class KeysetPaginationMixin:
+    """
+    Курсорная пагинация для ListView.
+    На HTMX-запрос «Показать ещё» отдаёт только фрагмент со следующими элементами.
+    """
+
+    keyset_paginate_by = 24
+    keyset_ordering = DEFAULT_ORDERING
+    cursor_kwarg = "cursor"
+    fragment_template_name = None
+
+    def get_template_names(self):
+        if self.fragment_template_name and is_htmx_fragment(
+            self.request, self.cursor_kwarg
+        ):
+            return [self.fragment_template_name]
+        return super().get_template_names()
+
+    def get_keyset_page(self):
+        return get_keyset_page(
+            self.request,
+            self.object_list,
+            self.keyset_paginate_by,
+            self.keyset_ordering,
+            self.cursor_kwarg,
+        )
+
+    async def aget_keyset_page(self):
+        return await aget_keyset_page(
+            self.request,
+            self.object_list,
+            self.keyset_paginate_by,
+            self.keyset_ordering,
+            self.cursor_kwarg,
+        )
+
+    def get_context_data(self, **kwargs):
+        # async-представление передаёт страницу, загруженную заранее.
+        page = kwargs.pop("page", None) or self.get_keyset_page()
+        context = super().get_context_data(object_list=page.object_list, **kwargs)
+        context["page"] = page
+        return context
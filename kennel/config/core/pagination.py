@@ -0,0 +1,137 @@
+import base64
+import json
+from typing import Optional, Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from django.http import Http404, HttpRequest
+
+DEFAULT_ORDERING = ("name", "id")
+
+
+class KeysetPage:
+    """Страница курсорной пагинации."""
+
+    def __init__(self, object_list: list, next_cursor: Optional[str]):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.next_url = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Курсорная (keyset) пагинация.
+    Вместо OFFSET фильтрует по последнему ключу предыдущей страницы,
+    поэтому страница N стоит столько же, сколько первая.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        per_page: int,
+        ordering: Sequence[str] = DEFAULT_ORDERING,
+    ):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    @staticmethod
+    def encode_cursor(values: Sequence) -> str:
+        """Упаковывает значения ключа в строку для URL."""
+        raw = json.dumps(list(values), cls=DjangoJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> list:
+        """Распаковывает курсор, при ошибке бросает ValueError."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (TypeError, ValueError) as error:
+            raise ValueError("Неверный курсор.") from error
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValueError("Неверный курсор.")
+        # Вложенные списки и словари дали бы TypeError (500) в фильтре.
+        if not all(isinstance(value, (str, int, float)) for value in values):
+            raise ValueError("Неверный курсор.")
+        return values
+
+    def _after(self, values: list) -> Q:
+        """Условие «строго после ключа» для лексикографического порядка."""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            equal = {name: value for name, value in zip(self.ordering[:index], values)}
+            condition |= Q(**equal, **{f"{field}__gt": values[index]})
+        return condition
+
+    def page_queryset(self, cursor: Optional[str] = None) -> QuerySet:
+        """Запрос одной страницы (+1 строка, чтобы узнать о следующей)."""
+        queryset = self.queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor)))
+        return queryset[: self.per_page + 1]
+
+    def get_page(self, cursor: Optional[str] = None) -> KeysetPage:
+        return self.make_page(list(self.page_queryset(cursor)))
+
+    async def aget_page(self, cursor: Optional[str] = None) -> KeysetPage:
+        return self.make_page([obj async for obj in self.page_queryset(cursor)])
+
+    def make_page(self, objects: list) -> KeysetPage:
+        next_cursor = None
+        if len(objects) > self.per_page:
+            objects = objects[: self.per_page]
+            last = objects[-1]
+            next_cursor = self.encode_cursor(
+                [getattr(last, field) for field in self.ordering]
+            )
+        return KeysetPage(objects, next_cursor)
+
+
+def get_keyset_page(
+    request: HttpRequest,
+    queryset: QuerySet,
+    per_page: int,
+    ordering: Sequence[str] = DEFAULT_ORDERING,
+    cursor_kwarg: str = "cursor",
+) -> KeysetPage:
+    """Возвращает страницу по курсору из GET-параметров запроса."""
+    paginator = KeysetPaginator(queryset, per_page, ordering)
+    try:
+        page = paginator.get_page(request.GET.get(cursor_kwarg))
+    except ValueError as error:
+        raise Http404(str(error))
+    return with_next_url(request, page, cursor_kwarg)
+
+
+async def aget_keyset_page(
+    request: HttpRequest,
+    queryset: QuerySet,
+    per_page: int,
+    ordering: Sequence[str] = DEFAULT_ORDERING,
+    cursor_kwarg: str = "cursor",
+) -> KeysetPage:
+    """Асинхронная версия get_keyset_page (async ORM)."""
+    paginator = KeysetPaginator(queryset, per_page, ordering)
+    try:
+        page = await paginator.aget_page(request.GET.get(cursor_kwarg))
+    except ValueError as error:
+        raise Http404(str(error))
+    return with_next_url(request, page, cursor_kwarg)
+
+
+def with_next_url(request: HttpRequest, page: KeysetPage, cursor_kwarg: str):
+    """Ссылка на следующую страницу сохраняет остальные параметры запроса."""
+    if page.has_next:
+        params = request.GET.copy()
+        params[cursor_kwarg] = page.next_cursor
+        page.next_url = f"?{params.urlencode()}"
+    return page
+
+
+def is_htmx_fragment(request: HttpRequest, cursor_kwarg: str = "cursor") -> bool:
+    """HTMX-запрос «Показать ещё» ждёт только новые элементы списка."""
+    return bool(request.headers.get("HX-Request") and request.GET.get(cursor_kwarg))
@@ -0,0 +1,107 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import render
+
+KEY = "ratelimit:{group}:{kind}:{value}:{window}"
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """Лимит "5/m" -> (5, 60): не больше 5 попыток за минуту."""
+    limit, period = rate.split("/")
+    return int(limit), PERIODS[period]
+
+
+def client_ip(request) -> str:
+    """
+    IP клиента: REMOTE_ADDR или заголовок прокси settings.RATELIMIT_IP_HEADER
+    (за nginx — HTTP_X_REAL_IP, см. compose.yml).
+    """
+    header = settings.RATELIMIT_IP_HEADER
+    return (header and request.META.get(header)) or request.META.get("REMOTE_ADDR", "")
+
+
+def hit(group: str, kind: str, value: str, rate: str) -> int:
+    """
+    Учитывает попытку и возвращает, через сколько секунд повторить (0 — можно).
+    Скользящее окно из двух счётчиков в кэше: текущее окно целиком
+    и прошлое с весом непрошедшей доли. add + incr атомарны в Redis
+    и Memcached, поэтому параллельные запросы не теряют попыток.
+    """
+    limit, period = parse_rate(rate)
+    now = time.time()
+    window = int(now // period)
+    value = hashlib.md5(value.encode()).hexdigest()
+    key = KEY.format(group=group, kind=kind, value=value, window=window)
+    cache.add(key, 0, period * 2)
+    try:
+        current = cache.incr(key)
+    except ValueError:
+        # Счётчик вытеснен между add и incr.
+        cache.set(key, 1, period * 2)
+        current = 1
+    previous = cache.get(
+        KEY.format(group=group, kind=kind, value=value, window=window - 1), 0
+    )
+    elapsed = now / period - window
+    if previous * (1 - elapsed) + current <= limit:
+        return 0
+    return int(period * (1 - elapsed)) + 1
+
+
+class RateLimitMixin:
+    """
+    Ограничение частоты POST-запросов до обработки формы: отклонённая
+    попытка не хэширует пароль и не отправляет письмо.
+    Лимиты группы — settings.RATELIMITS[ratelimit_group]: по IP клиента
+    и по значению поля ratelimit_field (email). С ratelimit_field_by_ip
+    поле считается вместе с IP — перебор паролей чужого адреса
+    не блокирует его владельца; без него — по аккаунту, со всех IP.
+    """
+
+    ratelimit_group = None
+    ratelimit_field = "email"
+    ratelimit_field_by_ip = True
+    ratelimit_methods = ("POST",)
+
+    def get_ratelimit_keys(self, request) -> dict[str, str]:
+        ip = client_ip(request)
+        keys = {"ip": ip}
+        value = request.POST.get(self.ratelimit_field, "").strip().lower()
+        if value:
+            if self.ratelimit_field_by_ip:
+                value = f"{ip}:{value}"
+            keys[self.ratelimit_field] = value
+        return keys
+
+    def check_ratelimit(self, request) -> int:
+        rates = settings.RATELIMITS[self.ratelimit_group]
+        retry_after = 0
+        for kind, value in self.get_ratelimit_keys(request).items():
+            if kind in rates:
+                retry_after = max(
+                    retry_after, hit(self.ratelimit_group, kind, value, rates[kind])
+                )
+        return retry_after
+
+    def ratelimited(self, retry_after: int) -> HttpResponse:
+        context = {"retry_after": retry_after}
+        if self.request.headers.get("HX-Request"):
+            response = render(self.request, "modals/429.html", context, status=429)
+            response["HX-Retarget"] = "#modals-container"
+            response["HX-Reswap"] = "innerHTML"
+        else:
+            response = render(self.request, "429.html", context, status=429)
+        response["Retry-After"] = str(retry_after)
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if settings.RATELIMIT_ENABLED and request.method in self.ratelimit_methods:
+            retry_after = self.check_ratelimit(request)
+            if retry_after:
+                return self.ratelimited(retry_after)
+        return super().dispatch(request, *args, **kwargs)
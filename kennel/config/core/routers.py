@@ -0,0 +1,136 @@
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "default"
+# users читаются только из основной БД: регистрация, вход, смена и сброс
+# пароля сразу читают то, что записали, и не должны зависеть от отставания.
+REPLICATED_APPS = {"dogs"}
+PIN_COOKIE = "db_primary"
+
+# Чтения текущего запроса или задачи идут в основную БД.
+use_primary = ContextVar("use_primary", default=False)
+
+
+@contextmanager
+def primary():
+    """Блок, в котором все чтения идут в основную БД."""
+    token = use_primary.set(True)
+    try:
+        yield
+    finally:
+        use_primary.reset(token)
+
+
+def pin_primary(response):
+    """
+    Read-your-writes: после записи пользователь читает из основной БД,
+    пока реплики не догонят её (DB_PRIMARY_PIN_SECONDS).
+    """
+    use_primary.set(True)
+    response.set_cookie(
+        PIN_COOKIE,
+        "1",
+        max_age=settings.DB_PRIMARY_PIN_SECONDS,
+        httponly=True,
+        samesite="Lax",
+    )
+    return response
+
+
+@sync_and_async_middleware
+def primary_pin_middleware(get_response):
+    """Переводит запросы с cookie закрепления на основную БД."""
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            token = use_primary.set(PIN_COOKIE in request.COOKIES)
+            try:
+                return await get_response(request)
+            finally:
+                use_primary.reset(token)
+
+    else:
+
+        def middleware(request):
+            token = use_primary.set(PIN_COOKIE in request.COOKIES)
+            try:
+                return get_response(request)
+            finally:
+                use_primary.reset(token)
+
+    return middleware
+
+
+class ReplicaRouter:
+    """
+    Запись — в основную БД, чтение моделей dogs — по кругу
+    из реплик settings.DATABASE_REPLICAS.
+    Недоступная реплика пропускается до следующей проверки
+    (раз в DB_REPLICA_CHECK_INTERVAL секунд); без живых реплик чтение
+    идёт в основную БД. Основная БД используется и внутри транзакции,
+    и после записи пользователя (см. pin_primary).
+    """
+
+    def __init__(self):
+        self.counter = itertools.count()
+        self.health = {}
+
+    def is_healthy(self, alias):
+        healthy, checked_at = self.health.get(alias, (True, None))
+        now = time.monotonic()
+        if (
+            checked_at is not None
+            and now - checked_at < settings.DB_REPLICA_CHECK_INTERVAL
+        ):
+            return healthy
+        connection = connections[alias]
+        try:
+            if connection.connection is not None and not connection.is_usable():
+                connection.close()
+            connection.ensure_connection()
+            healthy = True
+        except DatabaseError:
+            if healthy:
+                logger.warning(f"Реплика {alias} недоступна, чтение из {PRIMARY}.")
+            healthy = False
+        self.health[alias] = (healthy, now)
+        return healthy
+
+    def db_for_read(self, model, **hints):
+        if (
+            model._meta.app_label not in REPLICATED_APPS
+            or use_primary.get()
+            or connections[PRIMARY].in_atomic_block
+        ):
+            return PRIMARY
+        replicas = settings.DATABASE_REPLICAS
+        start = next(self.counter)
+        for offset in range(len(replicas)):
+            alias = replicas[(start + offset) % len(replicas)]
+            if self.is_healthy(alias):
+                return alias
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -1,11 +1,184 @@
-from django.db.models.signals import post_delete
+from collections import Counter
+
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
-from django.core.files.storage import default_storage
-from dogs.models import Dog
+from dogs import breed_stats
+from dogs.facets import NO, YES, apply_changes, dog_facets, facet_changes
+from dogs.models import Breed, BreedStats, Dog, DogParent
+from users.backends import auth_user_scope
+from users.models import User
+
+from .images import delete_image, ensure_thumbnails
+from .invalidation import bump, scope
+from .tasks import enqueue
+
+# Поля с фото, для которых создаются миниатюры
+IMAGE_FIELDS = {
+    Breed: "photo",
+    Dog: "photo",
+    User: "profile_picture",
+}
 
 
 @receiver(post_delete, sender=Dog)
 def delete_photo(sender, instance, **kwargs):
     """Удаление фото при удалении записи."""
-    if instance.photo and default_storage.exists(instance.photo.name):
-        default_storage.delete(instance.photo.name)
+    if instance.photo:
+        enqueue(delete_image, instance.photo.name)
+
+
+@receiver(post_save, sender=Breed)
+@receiver(post_save, sender=Dog)
+@receiver(post_save, sender=User)
+def make_thumbnails(sender, instance, update_fields=None, **kwargs):
+    """Миниатюры для нового фото."""
+    field_name = IMAGE_FIELDS[sender]
+    if update_fields and field_name not in update_fields:
+        return
+    photo = getattr(instance, field_name)
+    if photo:
+        enqueue(ensure_thumbnails, photo.name)
+
+
+@receiver([post_save, post_delete], sender=Breed)
+def bump_breed_version(sender, instance, **kwargs):
+    """Карточки пород и страница конкретной породы."""
+    bump(scope(Breed), scope(Breed, pk=instance.pk))
+
+
+@receiver(post_save, sender=Breed)
+def create_breed_stats(sender, instance, created, **kwargs):
+    """Пустая статистика новой породы: карточкам не нужен запрос на отсутствие строки."""
+    if created:
+        BreedStats.objects.get_or_create(breed=instance)
+
+
+# Поля, от которых зависят фасеты, статистика пород и кэш списка породы.
+DOG_TRACKED_FIELDS = ("breed_id", "birth_date", "photo", "owner_id")
+
+
+@receiver(pre_save, sender=Dog)
+def load_initial_dog(sender, instance, **kwargs):
+    """
+    Прежние значения собаки — одним запросом перед записью, а не снимком
+    в post_init: собаки загружаются намного чаще, чем сохраняются.
+    Dog.save атомарен, поэтому запрос идёт в основную БД.
+    """
+    instance._initial = None
+    if not instance._state.adding:
+        instance._initial = (
+            Dog.objects.filter(pk=instance.pk).values(*DOG_TRACKED_FIELDS).first()
+        )
+
+
+def initial_dog(instance: Dog) -> dict:
+    """Значения из load_initial_dog; {} — для новой собаки."""
+    return getattr(instance, "_initial", None) or {}
+
+
+@receiver(post_save, sender=Dog)
+def count_saved_dog_facets(sender, instance, created, **kwargs):
+    """Счётчики фасетов: +1 новым значениям, −1 прежним."""
+    old = {} if created else dog_facets(initial_dog(instance))
+    apply_changes(facet_changes(old, dog_facets(instance.__dict__)))
+
+
+@receiver(post_delete, sender=Dog)
+def count_deleted_dog_facets(sender, instance, **kwargs):
+    removed = facet_changes({}, dog_facets(instance.__dict__))
+    apply_changes(Counter({key: -delta for key, delta in removed.items()}))
+
+
+def current_stats(instance: Dog) -> dict:
+    return {"breed_id": instance.breed_id, "birth_date": instance.birth_date}
+
+
+@receiver(post_save, sender=Dog)
+def count_saved_dog_stats(sender, instance, created, **kwargs):
+    """Статистика пород: вклад собаки переносится с прежних значений на новые."""
+    old = None if created else initial_dog(instance) or None
+    breed_stats.apply_changes(breed_stats.stats_changes(old, current_stats(instance)))
+
+
+@receiver(pre_delete, sender=Dog)
+def load_deleted_dog_stats(sender, instance, **kwargs):
+    """Отложенные поля (only) дочитываются, пока строка ещё есть."""
+    instance._initial_stats = current_stats(instance)
+
+
+@receiver(post_delete, sender=Dog)
+def count_deleted_dog_stats(sender, instance, **kwargs):
+    breed_stats.apply_changes(
+        breed_stats.stats_changes(instance._initial_stats, None),
+        create_missing=False,
+    )
+
+
+@receiver([post_save, post_delete], sender=Dog)
+def bump_dog_version(sender, instance, **kwargs):
+    """Каталог, страница собаки и списки её старой и новой породы."""
+    breed_ids = {instance.breed_id, initial_dog(instance).get("breed_id")} - {None}
+    bump(
+        scope(Dog),
+        scope(Dog, pk=instance.pk),
+        *(scope(Dog, breed=breed_id) for breed_id in breed_ids),
+    )
+
+
+@receiver(post_delete, sender=Dog)
+def bump_pedigree_version(sender, instance, **kwargs):
+    """Ссылки на удалённую собаку в родословных обнуляются без сигналов."""
+    bump(scope(DogParent))
+
+
+@receiver([post_save, post_delete], sender=DogParent)
+def bump_dog_parent_version(sender, instance, **kwargs):
+    """Родословная относится к странице собаки."""
+    bump(
+        scope(DogParent),
+        scope(DogParent, dog=instance.dog_id),
+        scope(Dog, pk=instance.dog_id),
+    )
+
+
+def bump_owned_dogs(user: User) -> None:
+    """Контакты хозяина показываются на страницах его собак."""
+    dog_ids = Dog.objects.filter(owner_id=user.pk).values_list("pk", flat=True)
+    bump(*(scope(Dog, pk=dog_id) for dog_id in dog_ids))
+
+
+@receiver(post_save, sender=User)
+def bump_user_version(sender, instance, update_fields=None, **kwargs):
+    """Вход и смена пароля на публичные страницы не влияют."""
+    if update_fields and set(update_fields) <= {"last_login", "password"}:
+        return
+    bump(scope(User), scope(User, pk=instance.pk))
+    bump_owned_dogs(instance)
+
+
+@receiver([post_save, post_delete], sender=User)
+def bump_auth_user_version(sender, instance, **kwargs):
+    """
+    Кэш пользователя сессии: при любом сохранении, включая вход и смену
+    пароля (UserUpdateView, UserPasswordChangeView, set_password).
+    """
+    bump(auth_user_scope(instance.pk))
+
+
+@receiver(pre_delete, sender=User)
+def bump_deleted_user_version(sender, instance, **kwargs):
+    """До удаления, пока у собак ещё проставлен хозяин (SET_NULL)."""
+    bump(scope(User), scope(User, pk=instance.pk))
+    bump_owned_dogs(instance)
+
+
+@receiver(pre_delete, sender=User)
+def count_released_dogs_facets(sender, instance, **kwargs):
+    """Собаки удалённого хозяина остаются без хозяина (SET_NULL без сигналов)."""
+    dogs = Dog.objects.filter(owner_id=instance.pk).count()
+    apply_changes(Counter({("owner", YES): -dogs, ("owner", NO): dogs}))
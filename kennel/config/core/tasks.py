@@ -0,0 +1,82 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Any, Callable
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def run_task(func: Callable, *args: Any, **kwargs: Any) -> None:
+    """Выполняет задачу; ошибка пишется в лог и не роняет воркер."""
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Ошибка фоновой задачи {func.__module__}.{func.__name__}")
+
+
+class BaseBroker:
+    """
+    Интерфейс брокера задач.
+    Брокер получает функцию с аргументами и решает, где и когда её выполнить.
+    Для брокеров с хранилищем (БД, Redis) функцию удобно сериализовать
+    как путь импорта: task_path(func).
+    """
+
+    def __init__(self, **options: Any):
+        self.options = options
+
+    def enqueue(self, func: Callable, *args: Any, **kwargs: Any) -> None:
+        raise NotImplementedError
+
+    @staticmethod
+    def task_path(func: Callable) -> str:
+        return f"{func.__module__}.{func.__qualname__}"
+
+
+class ImmediateBroker(BaseBroker):
+    """Выполняет задачу сразу в текущем потоке (тесты, отладка)."""
+
+    def enqueue(self, func, *args, **kwargs):
+        run_task(func, *args, **kwargs)
+
+
+class ThreadPoolBroker(BaseBroker):
+    """Пул потоков внутри процесса: запрос не ждёт файловых операций."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.executor = ThreadPoolExecutor(
+            max_workers=options.get("max_workers", 2),
+            thread_name_prefix="kennel-task",
+        )
+
+    @staticmethod
+    def run_in_thread(func, *args, **kwargs):
+        # Соединения с БД у потока свои; как и в цикле запроса, они живут
+        # CONN_MAX_AGE и закрываются при ошибке или истечении срока.
+        close_old_connections()
+        try:
+            run_task(func, *args, **kwargs)
+        finally:
+            close_old_connections()
+
+    def enqueue(self, func, *args, **kwargs):
+        self.executor.submit(self.run_in_thread, func, *args, **kwargs)
+
+
+@cache
+def get_broker() -> BaseBroker:
+    broker_class = import_string(settings.TASKS_BROKER)
+    return broker_class(**settings.TASKS_BROKER_OPTIONS)
+
+
+def enqueue(func: Callable, *args: Any, **kwargs: Any) -> None:
+    """
+    Ставит задачу в очередь после коммита транзакции:
+    файл не удалится, если сохранение в БД откатилось.
+    """
+    transaction.on_commit(lambda: get_broker().enqueue(func, *args, **kwargs))
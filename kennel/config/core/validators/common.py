@@ -1,10 +1,13 @@
-from typing import Optional, Any
+from typing import Optional
 
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import UploadedFile
+from django.db.models.fields.files import FieldFile
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
-from django.core.files.storage import default_storage
+
+from config.core.images import delete_image
+from config.core.tasks import enqueue
 
 
 class DateValidator:
@@ -50,17 +53,17 @@ class PhotoValidator:
 
     @staticmethod
     def delete_old_photo(
-        instance: Any, field_name: str, new_file: Optional[UploadedFile]
+        old_file: Optional[FieldFile], new_file: Optional[FieldFile]
     ) -> None:
         """
         Удаление старого файла, если он был заменён.
-        :param instance: модуль, где есть поле с файлом
-        :param field_name: строка — имя поля
-        :param new_file: новый файл, пришедший на замену
+        Вызывается при сохранении формы, не в clean: удаление — фоновая
+        задача после коммита, поэтому невалидная форма или откат
+        транзакции не оставляют запись без фото.
+        :param old_file: файл поля до изменения (form.initial)
+        :param new_file: файл поля сохранённого объекта
         """
-        if not instance or not new_file:
+        if not old_file or not new_file:
             return
-        old_file = getattr(instance, field_name, None)
-        if old_file and old_file.name != new_file.name:
-            if default_storage.exists(old_file.name):
-                default_storage.delete(old_file.name)
+        if old_file.name != new_file.name:
+            enqueue(delete_image, old_file.name)
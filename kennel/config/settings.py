@@ -68,8 +68,13 @@ INSTALLED_APPS = [
     "dogs.apps.DogsConfig",
 ]
 
+if "postgresql" in (os.getenv("DB_ENGINE") or ""):
+    # Триграммный и полнотекстовый поиск (dogs/search.py).
+    INSTALLED_APPS.append("django.contrib.postgres")
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "config.core.routers.primary_pin_middleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -102,6 +107,23 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Режим сервера (gunicorn.conf.py): asgi (по умолчанию) — воркеры uvicorn
+# и async-представления, wsgi — синхронные воркеры.
+SERVER_MODE = os.getenv("SERVER_MODE", "asgi").lower()
+
+# Постоянные соединения: DB_CONN_MAX_AGE секунд жизни соединения
+# (0 — новое соединение на каждый запрос, «None» — без ограничения),
+# только для WSGI. Под ASGI соединение привязано к потоку запроса
+# и не переиспользуется, поэтому там всегда 0, а соединения держит пул.
+# Пул: DB_POOL=pgbouncer и DB_HOST=pgbouncer (сервис в compose.yml,
+# docker compose --profile pgbouncer up).
+
+DB_POOL = os.getenv("DB_POOL", "")
+DB_CONN_MAX_AGE = os.getenv("DB_CONN_MAX_AGE", "60").strip()
+DB_CONN_MAX_AGE = None if DB_CONN_MAX_AGE.lower() == "none" else int(DB_CONN_MAX_AGE)
+if SERVER_MODE == "asgi":
+    DB_CONN_MAX_AGE = 0
+
 DATABASES = {
     "default": {
         "ENGINE": os.getenv("DB_ENGINE"),
@@ -110,9 +132,126 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
+        # PgBouncer в режиме transaction не сохраняет серверные курсоры
+        # между транзакциями: iterator() тогда читает обычным курсором.
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOL == "pgbouncer",
     },
 }
 
+# Реплики для чтения: DB_REPLICAS=host1:5432,host2 (для SQLite — пути к файлам).
+# Остальные параметры берутся из основной БД. Роутер: config/core/routers.py.
+
+DB_REPLICAS = [
+    replica for replica in os.getenv("DB_REPLICAS", "").split(",") if replica
+]
+for number, replica in enumerate(DB_REPLICAS, start=1):
+    if "sqlite" in (DATABASES["default"]["ENGINE"] or ""):
+        location = {"NAME": replica}
+    else:
+        host, _, port = replica.partition(":")
+        location = {"HOST": host, "PORT": port or DATABASES["default"]["PORT"]}
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        **location,
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["config.core.routers.ReplicaRouter"]
+DB_REPLICA_CHECK_INTERVAL = int(os.getenv("DB_REPLICA_CHECK_INTERVAL", 10))
+DB_PRIMARY_PIN_SECONDS = int(os.getenv("DB_PRIMARY_PIN_SECONDS", 5))
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# По умолчанию кэш в памяти процесса. Для Redis/Memcached:
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://redis:6379/1
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "kennel"),
+        "KEY_PREFIX": "kennel",
+    },
+}
+
+# Время жизни кэша публичных страниц (сек.)
+PUBLIC_CACHE_TIMEOUT = int(os.getenv("PUBLIC_CACHE_TIMEOUT", 60 * 15))
+
+# Сессии: db (по умолчанию), cached_db — чтение из кэша с записью в БД,
+# signed_cookies — данные сессии в подписанной cookie, без хранилища.
+# cached_db и кэш пользователя сессии требуют общего кэша (Redis/Memcached):
+# в LocMemCache у каждого процесса своя копия.
+SESSION_ENGINE = "django.contrib.sessions.backends." + os.getenv(
+    "SESSION_STORAGE", "db"
+)
+AUTH_USER_CACHE = os.getenv("AUTH_USER_CACHE", "False") == "True"
+
+# Ограничение частоты входа и восстановления пароля (config/core/ratelimit.py):
+# "попыток/период", период s, m, h или d. Счётчики в кэше: для нескольких
+# процессов нужен общий кэш. Лимит email при входе считается для пары
+# IP + email: чужие попытки не блокируют вход владельцу адреса;
+# при восстановлении пароля — для email со всех IP.
+# IP клиента — REMOTE_ADDR; заголовок прокси (HTTP_X_REAL_IP за nginx)
+# задаётся только там, где его выставляет прокси, иначе клиент подделает IP.
+RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "True") == "True"
+RATELIMIT_IP_HEADER = os.getenv("RATELIMIT_IP_HEADER", "")
+RATELIMITS = {
+    "login": {
+        "ip": os.getenv("RATELIMIT_LOGIN_IP", "30/m"),
+        "email": os.getenv("RATELIMIT_LOGIN_EMAIL", "5/m"),
+    },
+    "reset_password": {
+        "ip": os.getenv("RATELIMIT_RESET_IP", "10/h"),
+        "email": os.getenv("RATELIMIT_RESET_EMAIL", "3/h"),
+    },
+}
+
+# Фоновые задачи (config/core/tasks.py): обработка и удаление файлов фото.
+# config.core.tasks.ImmediateBroker выполняет задачи сразу, в потоке запроса.
+TASKS_BROKER = os.getenv("TASKS_BROKER", "config.core.tasks.ThreadPoolBroker")
+TASKS_BROKER_OPTIONS = {
+    "max_workers": int(os.getenv("TASKS_WORKERS", 2)),
+}
+
+# Хэширование паролей (users/hashers.py): профиль pbkdf2, argon2 или scrypt.
+# Первый хэшер создаёт новые хэши, остальные проверяют старые; при входе
+# пароль перехэшируется по профилю. Подбор параметров: manage.py bench_hashers.
+PASSWORD_HASHER_PROFILE = os.getenv("PASSWORD_HASHER_PROFILE", "pbkdf2")
+PASSWORD_HASHER_PARAMS = {
+    "pbkdf2": {
+        "iterations": int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 720000)),
+    },
+    "argon2": {
+        "time_cost": int(os.getenv("PASSWORD_ARGON2_TIME_COST", 2)),
+        "memory_cost": int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", 19 * 1024)),
+        "parallelism": int(os.getenv("PASSWORD_ARGON2_PARALLELISM", 1)),
+    },
+    "scrypt": {
+        "work_factor": int(os.getenv("PASSWORD_SCRYPT_WORK_FACTOR", 2**14)),
+        "block_size": int(os.getenv("PASSWORD_SCRYPT_BLOCK_SIZE", 8)),
+        "parallelism": int(os.getenv("PASSWORD_SCRYPT_PARALLELISM", 1)),
+    },
+}
+PASSWORD_HASHER_CLASSES = {
+    "pbkdf2": "users.hashers.PBKDF2ProfileHasher",
+    "argon2": "users.hashers.Argon2ProfileHasher",
+    "scrypt": "users.hashers.ScryptProfileHasher",
+}
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[PASSWORD_HASHER_PROFILE],
+    *(
+        path
+        for name, path in PASSWORD_HASHER_CLASSES.items()
+        if name != PASSWORD_HASHER_PROFILE
+    ),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -154,12 +293,22 @@ STATIC_ROOT = os.path.join(BASE_DIR.parent, "static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "config/core/media")
 
+# Миниатюры фото (config/core/images.py): ширины в px для srcset
+THUMBNAIL_WIDTHS = (200, 400, 800)
+THUMBNAIL_QUALITY = 80
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "users.User"
+# ModelBackend — для сессий, созданных до CachedModelBackend: в сессии
+# хранится путь бэкенда, без него в списке пользователь выходит из системы.
+AUTHENTICATION_BACKENDS = [
+    "users.backends.CachedModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
 
 # Auth redirects
 LOGIN_REDIRECT_URL = "users:profile"
@@ -178,6 +327,15 @@ EMAIL_USE_SSL = True  # порт 465
 EMAIL_SERVER = EMAIL_HOST_USER
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 EMAIL_ADMIN = EMAIL_HOST_USER
+EMAIL_TIMEOUT = 10
+SITE_URL = os.getenv("SITE_URL", "https://cod-ex.ru")
+
+# Очередь писем (config/core/mail.py)
+MAIL_QUEUE_ASYNC = os.getenv("MAIL_QUEUE_ASYNC", "True") == "True"
+MAIL_BATCH_SIZE = 50  # писем на одно SMTP-соединение
+MAIL_BATCH_WAIT = 0.5  # сек. ожидания следующего письма в пакет
+MAIL_MAX_RETRIES = 3
+MAIL_RETRY_DELAY = 2  # сек., удваивается с каждой попыткой
 
 os.makedirs(BASE_DIR / "logs", exist_ok=True)
 LOGGING = {
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Breed, Dog
+
+from config.core.export import ExportAdminMixin
+from .forms import DogParentAdminForm
+from .models import Breed, Dog, DogParent
 
 
 @admin.register(Breed)
@@ -14,7 +17,7 @@ class BreadAdmin(admin.ModelAdmin):
 
 
 @admin.register(Dog)
-class DogAdmin(admin.ModelAdmin):
+class DogAdmin(ExportAdminMixin, admin.ModelAdmin):
     list_display = (
         "name",
         "breed",
@@ -30,3 +33,41 @@ class DogAdmin(admin.ModelAdmin):
     ordering = ("name",)
     search_fields = ("name",)
     readonly_fields = ()
+    export_fields = {
+        "id": "id",
+        "name": "name",
+        "breed": "breed__name",
+        "birth_date": "birth_date",
+        "owner": "owner__email",
+        "photo": "photo",
+    }
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).for_admin()
+
+
+@admin.register(DogParent)
+class DogParentAdmin(ExportAdminMixin, admin.ModelAdmin):
+    form = DogParentAdminForm
+    list_display = (
+        "name",
+        "breed",
+        "birth_date",
+        "dog",
+    )
+    list_select_related = (
+        "breed",
+        "dog",
+    )
+    raw_id_fields = ("dog", "parent")
+    ordering = ("id",)
+    search_fields = ("name",)
+    export_fields = {
+        "id": "id",
+        "dog_id": "dog_id",
+        "dog": "dog__name",
+        "parent_id": "parent_id",
+        "name": "name",
+        "breed": "breed__name",
+        "birth_date": "birth_date",
+    }
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class DogsConfig(AppConfig):
@@ -7,3 +8,6 @@ class DogsConfig(AppConfig):
 
     def ready(self):
         import config.core.signals
+        from .search import create_search_indexes
+
+        post_migrate.connect(create_search_indexes, sender=self)
@@ -0,0 +1,126 @@
+"""
+Статистика пород для карточек: число собак, средний возраст, последняя собака.
+
+Строки BreedStats меняются сигналами собак внутри транзакции сохранения
+(Dog.save атомарен, удаление атомарно само по себе), поэтому карточки
+получают счётчики одним JOIN (Breed.objects.for_cards()) без COUNT на карточку.
+Средний возраст считается по сумме дат рождения (в днях) — она меняется
+на ±дату, а не пересчитывается. После изменений в обход сигналов:
+manage.py rebuild_breed_stats.
+"""
+
+from collections import Counter
+from datetime import date
+from typing import Iterable, Mapping
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Subquery
+from django.utils import timezone
+
+from config.core.invalidation import bump, scope
+from .models import Breed, BreedStats, Dog
+
+
+def dog_stats(breed_id, birth_date: date | None) -> Counter:
+    """Вклад одной собаки в счётчики породы."""
+    changes = Counter({(breed_id, "dog_count"): 1})
+    if birth_date:
+        changes[breed_id, "dated_count"] += 1
+        changes[breed_id, "birth_ordinal_sum"] += birth_date.toordinal()
+    return changes
+
+
+def dogs_stats(dogs: Iterable[Dog]) -> Counter:
+    """Вклад нескольких собак (импорт через bulk_create)."""
+    changes = Counter()
+    for dog in dogs:
+        changes.update(dog_stats(dog.breed_id, dog.birth_date))
+    return changes
+
+
+def stats_changes(old: Mapping | None, new: Mapping | None) -> Counter:
+    """Разница вкладов собаки до и после сохранения: {"breed_id", "birth_date"}."""
+    changes = Counter()
+    if new:
+        changes.update(dog_stats(new["breed_id"], new["birth_date"]))
+    if old:
+        changes.subtract(dog_stats(old["breed_id"], old["birth_date"]))
+    return Counter({key: delta for key, delta in changes.items() if delta})
+
+
+def latest_dog(breed_id) -> Subquery:
+    return Subquery(
+        Dog.objects.filter(breed_id=breed_id).order_by("-pk").values("pk")[:1]
+    )
+
+
+def count_breed(breed_id) -> dict:
+    """Счётчики породы по таблице собак."""
+    dogs = Dog.objects.filter(breed_id=breed_id)
+    totals = dogs.aggregate(dog_count=Count("id"), dated_count=Count("birth_date"))
+    birth_dates = dogs.filter(birth_date__isnull=False).values_list(
+        "birth_date", flat=True
+    )
+    totals["birth_ordinal_sum"] = sum(d.toordinal() for d in birth_dates.iterator())
+    totals["latest_dog_id"] = dogs.order_by("-pk").values_list("pk", flat=True).first()
+    return totals
+
+
+def apply_changes(changes: Counter, create_missing: bool = True) -> None:
+    """
+    Прибавляет изменения к счётчикам пород (F-выражения, без гонок)
+    и заново выбирает последнюю собаку затронутых пород.
+    Отсутствующая строка создаётся пересчётом породы; при удалении
+    не создаётся: порода может удаляться в той же транзакции.
+    """
+    by_breed = {}
+    for (breed_id, field), delta in changes.items():
+        if delta:
+            by_breed.setdefault(breed_id, {})[field] = delta
+    if not by_breed:
+        return
+    now = timezone.now()
+    for breed_id, deltas in by_breed.items():
+        rows = BreedStats.objects.filter(breed_id=breed_id)
+        values = {field: F(field) + delta for field, delta in deltas.items()}
+        values.update(latest_dog_id=latest_dog(breed_id), updated_at=now)
+        if rows.update(**values) or not create_missing:
+            continue
+        try:
+            with transaction.atomic():
+                BreedStats.objects.create(
+                    breed_id=breed_id, updated_at=now, **count_breed(breed_id)
+                )
+        except IntegrityError:
+            # Строку успел создать параллельный запрос.
+            rows.update(**values)
+    bump(scope(BreedStats))
+
+
+def rebuild() -> int:
+    """Пересчитывает статистику всех пород по таблице собак."""
+    stats = {
+        breed_id: BreedStats(breed_id=breed_id)
+        for breed_id in Breed.objects.values_list("pk", flat=True)
+    }
+    dogs = Dog.objects.order_by()
+    counts = dogs.values_list("breed_id").annotate(
+        dog_count=Count("id"), dated_count=Count("birth_date"), latest=Max("id")
+    )
+    for breed_id, dog_count, dated_count, latest in counts:
+        stats[breed_id].dog_count = dog_count
+        stats[breed_id].dated_count = dated_count
+        stats[breed_id].latest_dog_id = latest
+    birth_dates = dogs.filter(birth_date__isnull=False).values_list(
+        "breed_id", "birth_date"
+    )
+    for breed_id, birth_date in birth_dates.iterator():
+        stats[breed_id].birth_ordinal_sum += birth_date.toordinal()
+    now = timezone.now()
+    for row in stats.values():
+        row.updated_at = now
+    with transaction.atomic():
+        BreedStats.objects.all().delete()
+        BreedStats.objects.bulk_create(stats.values())
+    bump(scope(BreedStats))
+    return len(stats)
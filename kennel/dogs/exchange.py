@@ -0,0 +1,123 @@
+"""
+Формат обмена данными о собаках (импорт и экспорт).
+
+Запись собаки в JSONL:
+{"name": "Рекс", "breed": "Бульдог", "birth_date": "2020-01-31",
+ "owner": "owner@mail.ru", "photo": "dogs/rex.jpg",
+ "parents": [{"name": "Макс", "breed": "Бульдог", "birth_date": null}]}
+
+В CSV родители раскладываются по колонкам parent1_*, parent2_*.
+"""
+
+import csv
+import json
+from typing import IO, Iterable, Iterator
+
+from config.core.export import LineBuffer
+
+DOG_FIELDS = ("name", "breed", "birth_date", "owner", "photo")
+PARENT_FIELDS = ("name", "breed", "birth_date")
+PARENT_SLOTS = ("parent1", "parent2")
+CSV_FIELDS = DOG_FIELDS + tuple(
+    f"{slot}_{field}" for slot in PARENT_SLOTS for field in PARENT_FIELDS
+)
+FORMATS = ("csv", "jsonl")
+
+
+def guess_format(path: str) -> str:
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def csv_row_to_record(row: dict) -> dict:
+    record = {field: row.get(field) or None for field in DOG_FIELDS}
+    record["parents"] = [
+        {field: row.get(f"{slot}_{field}") or None for field in PARENT_FIELDS}
+        for slot in PARENT_SLOTS
+        if row.get(f"{slot}_name")
+    ]
+    return record
+
+
+def record_to_csv_row(record: dict) -> dict:
+    row = {field: record.get(field) or "" for field in DOG_FIELDS}
+    for slot, parent in zip(PARENT_SLOTS, record.get("parents") or []):
+        for field in PARENT_FIELDS:
+            row[f"{slot}_{field}"] = parent.get(field) or ""
+    return row
+
+
+def read_rows(file: IO[str], file_format: str) -> Iterator[tuple[int, dict | str]]:
+    """
+    Построчно читает файл, не загружая его в память. Отдаёт (номер строки,
+    строка): словарь CSV или нераскодированную строку JSONL — ошибка
+    в одной строке не должна прерывать чтение остальных (см. parse_record).
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_num, line in enumerate(file, start=1):
+        if line.strip():
+            yield line_num, line
+
+
+def check_fields(record, fields: tuple[str, ...], label: str) -> None:
+    if not isinstance(record, dict):
+        raise ValueError(f"{label} должна быть объектом JSON.")
+    for field in fields:
+        if not isinstance(record.get(field) or "", str):
+            raise ValueError(f"{label}: поле «{field}» должно быть строкой.")
+
+
+def parse_record(row: dict | str, file_format: str) -> dict:
+    """Запись из строки read_rows; некорректные данные — ValueError."""
+    if file_format == "csv":
+        return csv_row_to_record(row)
+    try:
+        record = json.loads(row)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Некорректный JSON: {error}.")
+    check_fields(record, DOG_FIELDS, "Запись")
+    parents = record.get("parents") or []
+    if not isinstance(parents, list):
+        raise ValueError("Запись: поле «parents» должно быть списком.")
+    for parent in parents:
+        check_fields(parent, PARENT_FIELDS, "Запись родителя")
+    return record
+
+
+def dog_to_record(dog) -> dict:
+    """Запись собаки; порода, хозяин и родители должны быть подгружены заранее."""
+    return {
+        "name": dog.name,
+        "breed": dog.breed.name,
+        "birth_date": dog.birth_date.isoformat() if dog.birth_date else None,
+        "owner": dog.owner.email if dog.owner else None,
+        "photo": dog.photo.name or None,
+        "parents": [
+            {
+                "name": parent.name,
+                "breed": parent.breed.name,
+                "birth_date": (
+                    parent.birth_date.isoformat() if parent.birth_date else None
+                ),
+            }
+            for parent in dog.dogparent_set.all()
+        ],
+    }
+
+
+def iter_lines(records: Iterable[dict], file_format: str) -> Iterator[str]:
+    """Строки файла экспорта (с заголовком для CSV)."""
+    if file_format == "jsonl":
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        return
+    buffer = LineBuffer()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    yield buffer.pop()
+    for record in records:
+        writer.writerow(record_to_csv_row(record))
+        yield buffer.pop()
@@ -0,0 +1,231 @@
+"""
+Фасетный фильтр каталога собак.
+
+Счётчики лежат в DogFacetCount и меняются на ±1 сигналами сохранения
+и удаления собак, поэтому боковая панель не делает COUNT(*) GROUP BY
+по всей таблице. Возраст хранится как месяц рождения: границы возрастных
+групп проходят по месяцам, и сумма счётчиков совпадает с фильтром.
+После массовых изменений в обход сигналов: manage.py rebuild_dog_facets.
+"""
+
+from collections import Counter
+from datetime import date
+from typing import Mapping
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, QuerySet
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.http import QueryDict
+
+from config.core.invalidation import bump, scope
+from .models import Dog, DogFacetCount
+
+YES, NO = "yes", "no"
+UNKNOWN = "unknown"
+# Ключ, подпись, возраст в месяцах: от (включительно) и до.
+AGE_BUCKETS = (
+    ("puppy", "До года", 0, 12),
+    ("young", "1–3 года", 12, 36),
+    ("adult", "3–8 лет", 36, 96),
+    ("senior", "Старше 8 лет", 96, None),
+)
+FLAG_FACETS = {"photo": "Фото", "owner": "Хозяин"}
+FLAG_CONDITIONS = {
+    "photo": Q(photo__isnull=False) & ~Q(photo=""),
+    "owner": Q(owner__isnull=False),
+}
+FLAG_LABELS = {YES: "Есть", NO: "Нет"}
+
+
+def dog_facets(fields: Mapping) -> dict[str, str]:
+    """
+    Значения фасетов по полям собаки (instance.__dict__).
+    Отложенные поля (only) пропускаются: их значения не менялись.
+    """
+    facets = {}
+    if "breed_id" in fields:
+        facets["breed"] = str(fields["breed_id"])
+    if "birth_date" in fields:
+        birth_date = fields["birth_date"]
+        facets["birth_month"] = str(birth_date)[:7] if birth_date else ""
+    if "photo" in fields:
+        photo = fields["photo"]
+        facets["photo"] = YES if getattr(photo, "name", photo) else NO
+    if "owner_id" in fields:
+        facets["owner"] = YES if fields["owner_id"] else NO
+    return facets
+
+
+def facet_changes(old: Mapping, new: Mapping) -> Counter:
+    changes = Counter()
+    for facet, value in new.items():
+        if facet in old and old[facet] == value:
+            continue
+        changes[facet, value] += 1
+        if facet in old:
+            changes[facet, old[facet]] -= 1
+    return changes
+
+
+def apply_changes(changes: Counter) -> None:
+    """Атомарно прибавляет изменения к счётчикам (F-выражения, без гонок)."""
+    changes = {key: delta for key, delta in changes.items() if delta}
+    if not changes:
+        return
+    for (facet, value), delta in changes.items():
+        counters = DogFacetCount.objects.filter(facet=facet, value=value)
+        if counters.update(count=F("count") + delta):
+            continue
+        try:
+            with transaction.atomic():
+                DogFacetCount.objects.create(facet=facet, value=value, count=delta)
+        except IntegrityError:
+            # Строку успел создать параллельный запрос.
+            counters.update(count=F("count") + delta)
+    bump(scope(DogFacetCount))
+
+
+def rebuild() -> int:
+    """Пересчитывает все счётчики по таблице собак."""
+    counts = Counter()
+    dogs = Dog.objects.order_by()
+    for breed_id, count in dogs.values_list("breed_id").annotate(n=Count("id")):
+        counts["breed", str(breed_id)] = count
+    months = dogs.annotate(
+        year=ExtractYear("birth_date"), month=ExtractMonth("birth_date")
+    ).values_list("year", "month")
+    for year, month, count in months.annotate(n=Count("id")):
+        counts["birth_month", f"{year:04d}-{month:02d}" if year else ""] = count
+    total = dogs.count()
+    for facet, condition in FLAG_CONDITIONS.items():
+        with_flag = dogs.filter(condition).count()
+        counts[facet, YES] = with_flag
+        counts[facet, NO] = total - with_flag
+    rows = [
+        DogFacetCount(facet=facet, value=value, count=count)
+        for (facet, value), count in counts.items()
+        if count
+    ]
+    with transaction.atomic():
+        DogFacetCount.objects.all().delete()
+        DogFacetCount.objects.bulk_create(rows)
+    bump(scope(DogFacetCount))
+    return len(rows)
+
+
+def months_ago(today: date, months: int) -> date:
+    """Первое число месяца, который был months месяцев назад."""
+    index = today.year * 12 + today.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def age_in_months(birth_month: str, today: date) -> int:
+    year, month = map(int, birth_month.split("-"))
+    return (today.year - year) * 12 + today.month - month
+
+
+def filter_dogs(queryset: QuerySet, params: QueryDict, today: date) -> QuerySet:
+    """Фильтры каталога из GET-параметров; некорректные значения игнорируются."""
+    breed = params.get("breed")
+    if breed and breed.isdigit():
+        queryset = queryset.filter(breed_id=int(breed))
+    age = params.get("age")
+    if age == UNKNOWN:
+        queryset = queryset.filter(birth_date__isnull=True)
+    for key, _, min_months, max_months in AGE_BUCKETS:
+        if age != key:
+            continue
+        if max_months is not None:
+            queryset = queryset.filter(
+                birth_date__gte=months_ago(today, max_months - 1)
+            )
+        if min_months:
+            queryset = queryset.filter(birth_date__lt=months_ago(today, min_months - 1))
+    for facet, condition in FLAG_CONDITIONS.items():
+        value = params.get(facet)
+        if value == YES:
+            queryset = queryset.filter(condition)
+        elif value == NO:
+            queryset = queryset.exclude(condition)
+    return queryset
+
+
+def load_counts() -> dict[str, dict[str, int]]:
+    counts = {}
+    for facet, value, count in DogFacetCount.objects.values_list(
+        "facet", "value", "count"
+    ):
+        counts.setdefault(facet, {})[value] = count
+    return counts
+
+
+async def aload_counts() -> dict[str, dict[str, int]]:
+    counts = {}
+    async for facet, value, count in DogFacetCount.objects.values_list(
+        "facet", "value", "count"
+    ):
+        counts.setdefault(facet, {})[value] = count
+    return counts
+
+
+def option(params: QueryDict, facet: str, value: str, label: str, count: int) -> dict:
+    """Пункт панели: ссылка включает или снимает фильтр и сбрасывает курсор."""
+    query = params.copy()
+    query.pop("cursor", None)
+    selected = params.get(facet) == value
+    if selected:
+        query.pop(facet, None)
+    else:
+        query[facet] = value
+    return {
+        "label": label,
+        "count": count,
+        "selected": selected,
+        "url": f"?{query.urlencode()}",
+    }
+
+
+def sidebar(
+    counts: Mapping, breed_names: Mapping[int, str], params: QueryDict, today: date
+) -> list[dict]:
+    """Группы фильтров с числом собак; пустые пункты не показываются."""
+    breeds = [
+        option(params, "breed", value, breed_names[int(value)], count)
+        for value, count in counts.get("breed", {}).items()
+        if count > 0 and int(value) in breed_names
+    ]
+    breeds.sort(key=lambda item: item["label"])
+
+    ages = Counter()
+    for birth_month, count in counts.get("birth_month", {}).items():
+        if not birth_month:
+            ages[UNKNOWN] += count
+            continue
+        months = age_in_months(birth_month, today)
+        for key, _, min_months, max_months in AGE_BUCKETS:
+            if months >= min_months and (max_months is None or months < max_months):
+                ages[key] += count
+    age_labels = [(key, label) for key, label, *_ in AGE_BUCKETS]
+    age_options = [
+        option(params, "age", key, label, ages[key])
+        for key, label in [*age_labels, (UNKNOWN, "Не указан")]
+        if ages[key] > 0
+    ]
+
+    groups = [
+        {"title": "Порода", "options": breeds},
+        {"title": "Возраст", "options": age_options},
+    ]
+    for facet, title in FLAG_FACETS.items():
+        values = counts.get(facet, {})
+        groups.append(
+            {
+                "title": title,
+                "options": [
+                    option(params, facet, value, label, values.get(value, 0))
+                    for value, label in FLAG_LABELS.items()
+                    if values.get(value, 0) > 0
+                ],
+            }
+        )
+    return [group for group in groups if group["options"]]
@@ -1,10 +1,15 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils.functional import cached_property
 
 from .models import (
+    Breed,
     Dog,
     DogParent,
 )
+from .pedigree import descendant_ids
+from config.core.invalidation import bump, scope
 from config.core.validators.common import (
     DateValidator,
     PhotoValidator,
@@ -45,16 +50,218 @@ class DogForm(forms.ModelForm):
             return
         PhotoValidator.photo_size(new_photo)
         PhotoValidator.photo_extension(new_photo)
-        PhotoValidator.delete_old_photo(self.instance, "photo", new_photo)
         return new_photo
 
+    def save(self, commit=True):
+        """Сохраняет собаку; заменённое фото удаляется после коммита."""
+        with transaction.atomic():
+            dog = super().save(commit)
+            if commit:
+                PhotoValidator.delete_old_photo(self.initial.get("photo"), dog.photo)
+        return dog
+
+
+class LoadedModelChoiceField(forms.ModelChoiceField):
+    """Выбор объекта по ID; объекты, загруженные формсетом заранее, — без запроса."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loaded = {}
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.loaded[int(value)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_python(value)
+
 
 class DogParentForm(forms.ModelForm):
     class Meta:
         model = DogParent
         fields = "__all__"
+        field_classes = {
+            "parent": LoadedModelChoiceField,
+            "breed": LoadedModelChoiceField,
+        }
         widgets = {
             "birth_date": forms.DateInput(
                 attrs={"placeholder": "дд.мм.гггг", "class": "form-control"}
             ),
+            # Собак много: выпадающий список загружал бы всю таблицу.
+            "parent": forms.NumberInput(attrs={"placeholder": "ID собаки в базе"}),
         }
+
+    def __init__(self, *args, parents=None, breeds=None, descendants=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Для родителя из базы имя и порода берутся из его карточки.
+        self.fields["name"].required = False
+        self.fields["breed"].required = False
+        self.fields["parent"].queryset = Dog.objects.select_related("breed")
+        self.fields["parent"].loaded = parents or {}
+        if breeds is not None:
+            breed_field = self.fields["breed"]
+            breed_field.loaded = breeds
+            breed_field.choices = [
+                ("", breed_field.empty_label),
+                *((pk, breed_field.label_from_instance(b)) for pk, b in breeds.items()),
+            ]
+        self.descendants = descendants
+
+    def _get_validation_exclusions(self):
+        # Родитель и порода уже получены из базы полями формы:
+        # проверка существования в модели — лишний запрос на каждую форму.
+        return super()._get_validation_exclusions() | {"parent", "breed"}
+
+    def clean(self):
+        """Родитель из базы или имя с породой; без циклов в родословной."""
+        cleaned_data = super().clean()
+        parent = cleaned_data.get("parent")
+        dog_id = self.instance.dog_id
+        if parent:
+            if self.descendants is None and dog_id:
+                self.descendants = descendant_ids(dog_id)
+            if dog_id and (parent.pk == dog_id or parent.pk in self.descendants):
+                raise ValidationError("Собака не может быть своим предком.")
+            cleaned_data["name"] = parent.name
+            cleaned_data["breed"] = parent.breed
+            cleaned_data["birth_date"] = parent.birth_date
+            return cleaned_data
+        for field in ("name", "breed"):
+            if not cleaned_data.get(field):
+                self.add_error(field, "Укажите родителя из базы или имя и породу.")
+        return cleaned_data
+
+
+class DogParentAdminForm(forms.ModelForm):
+    """Родитель в админке: без циклов в родословной."""
+
+    class Meta:
+        model = DogParent
+        fields = "__all__"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        dog = cleaned_data.get("dog")
+        parent = cleaned_data.get("parent")
+        if (
+            dog
+            and parent
+            and (parent.pk == dog.pk or parent.pk in descendant_ids(dog.pk))
+        ):
+            self.add_error("parent", "Собака не может быть своим предком.")
+        return cleaned_data
+
+
+class BaseDogParentFormSet(forms.BaseInlineFormSet):
+    """
+    Родители в форме редактирования собаки.
+    Записи родителей читаются одним запросом с породой, собаки-родители
+    из POST — одним in_bulk, породы и потомки для проверки циклов —
+    один раз на формсет. Изменения сохраняются пакетно в одной транзакции.
+    """
+
+    update_fields = ("parent", "name", "breed", "birth_date")
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("queryset", DogParent.objects.select_related("breed"))
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def existing(self):
+        return {obj.pk: obj for obj in self.get_queryset()}
+
+    @cached_property
+    def parents(self):
+        if not self.is_bound:
+            return {}
+        ids = set()
+        for i in range(self.total_form_count()):
+            value = self.data.get(f"{self.add_prefix(i)}-parent", "")
+            if str(value).isdigit():
+                ids.add(int(value))
+        return Dog.objects.select_related("breed").in_bulk(ids) if ids else {}
+
+    @cached_property
+    def descendants(self):
+        if not self.parents or self.instance.pk is None:
+            return set()
+        return descendant_ids(self.instance.pk)
+
+    @cached_property
+    def breeds(self):
+        return {breed.pk: breed for breed in Breed.objects.only("id", "name")}
+
+    def get_form_kwargs(self, index):
+        kwargs = super().get_form_kwargs(index)
+        kwargs["parents"] = self.parents
+        kwargs["breeds"] = self.breeds
+        if self.is_bound:
+            kwargs["descendants"] = self.descendants
+        return kwargs
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        # Скрытое поле id: записи уже прочитаны get_queryset(); чужой
+        # или несуществующий id не проходит проверку, а не подменяет запись.
+        pk_field = form.fields[self._pk_field.name]
+        form.fields[self._pk_field.name] = field = LoadedModelChoiceField(
+            self.get_queryset(),
+            initial=pk_field.initial,
+            required=False,
+            widget=pk_field.widget,
+        )
+        field.loaded = self.existing
+
+    def save(self, commit=True):
+        """Удаление, bulk_update и bulk_create вместо запроса на каждую форму."""
+        if not commit:
+            return super().save(commit=False)
+        self.new_objects, self.changed_objects, self.deleted_objects = [], [], []
+        for form in self.initial_forms:
+            if form.instance.pk is None:
+                # Запись удалена параллельно или id подменён.
+                continue
+            if self.can_delete and self._should_delete_form(form):
+                self.deleted_objects.append(form.instance)
+            elif form.has_changed():
+                self.changed_objects.append((form.instance, form.changed_data))
+        for form in self.extra_forms:
+            if not form.has_changed() or (
+                self.can_delete and self._should_delete_form(form)
+            ):
+                continue
+            form.instance.dog = self.instance
+            self.new_objects.append(form.instance)
+        if not (self.new_objects or self.changed_objects or self.deleted_objects):
+            return []
+        with transaction.atomic():
+            if self.deleted_objects:
+                DogParent.objects.filter(
+                    dog=self.instance,
+                    pk__in=[obj.pk for obj in self.deleted_objects],
+                ).delete()
+            if self.changed_objects:
+                DogParent.objects.bulk_update(
+                    [obj for obj, _ in self.changed_objects], self.update_fields
+                )
+            if self.new_objects:
+                DogParent.objects.bulk_create(self.new_objects)
+        # bulk_create и bulk_update не шлют сигналов.
+        bump(
+            scope(DogParent),
+            scope(DogParent, dog=self.instance.pk),
+            scope(Dog, pk=self.instance.pk),
+        )
+        return self.new_objects + [obj for obj, _ in self.changed_objects]
+
+
+DogParentFormSet = forms.inlineformset_factory(
+    Dog,
+    DogParent,
+    form=DogParentForm,
+    formset=BaseDogParentFormSet,
+    fk_name="dog",
+    extra=1,
+)
@@ -0,0 +1,120 @@
+"""
+Коэффициент инбридинга (COI) по Райту.
+
+COI собаки равен коэффициенту родства её родителей f(sire, dam). Он
+считается рекурсией табличного метода с мемоизацией:
+    f(a, a) = (1 + F(a)) / 2,
+    f(a, b) = (f(sire(a), b) + f(dam(a), b)) / 2,
+где a не может быть предком b (его «поколение» в подграфе не меньше).
+Пары без общих предков сразу дают 0, поэтому обходятся только ветви
+с общими предками. Подграф предков загружается одним запросом.
+"""
+
+from config.core.cache import cached
+from config.core.invalidation import scope
+from .models import Dog, DogParent
+from .pedigree import ancestor_edges
+
+COI_GENERATIONS = 10
+
+
+class Pedigree:
+    """Подграф предков в памяти: id собаки -> id родителей (не больше двух)."""
+
+    def __init__(self, parents: dict[int, list[int]]):
+        self.parents = {dog_id: ids[:2] for dog_id, ids in parents.items()}
+        self.ranks = {}
+        self.ancestor_sets = {}
+        self.kinships = {}
+
+    def rank(self, dog_id: int) -> int:
+        """Поколение в подграфе: основатели — 0, потомок старше родителей."""
+        if dog_id not in self.ranks:
+            parents = self.parents.get(dog_id, ())
+            self.ranks[dog_id] = 1 + max(map(self.rank, parents), default=-1)
+        return self.ranks[dog_id]
+
+    def ancestors(self, dog_id: int) -> frozenset:
+        """Собака и все её предки."""
+        if dog_id not in self.ancestor_sets:
+            found = {dog_id}
+            for parent_id in self.parents.get(dog_id, ()):
+                found |= self.ancestors(parent_id)
+            self.ancestor_sets[dog_id] = frozenset(found)
+        return self.ancestor_sets[dog_id]
+
+    def kinship(self, a: int | None, b: int | None) -> float:
+        """Коэффициент родства: вероятность идентичности аллелей по происхождению."""
+        if a is None or b is None:
+            return 0.0
+        key = (a, b) if a <= b else (b, a)
+        if key not in self.kinships:
+            if a == b:
+                value = (1 + self.inbreeding(a)) / 2
+            elif self.ancestors(a).isdisjoint(self.ancestors(b)):
+                value = 0.0
+            else:
+                if self.rank(a) < self.rank(b):
+                    a, b = b, a
+                # Неизвестный родитель вносит 0.
+                value = 0.0
+                for parent_id in self.parents.get(a, ()):
+                    value += self.kinship(parent_id, b)
+                value /= 2
+            self.kinships[key] = value
+        return self.kinships[key]
+
+    def inbreeding(self, dog_id: int) -> float:
+        parents = self.parents.get(dog_id, [])
+        if len(parents) < 2:
+            return 0.0
+        return self.kinship(*parents)
+
+    def common_ancestors(self, a: int, b: int) -> set[int]:
+        return set(self.ancestors(a) & self.ancestors(b))
+
+
+def load_pedigree(*dog_ids: int, generations: int = COI_GENERATIONS) -> Pedigree:
+    return Pedigree(ancestor_edges(dog_ids, generations))
+
+
+def dog_coi(dog_id: int, generations: int = COI_GENERATIONS) -> float:
+    """COI собаки; кэшируется до изменения родословных."""
+    return cached(
+        "coi",
+        [dog_id, generations],
+        lambda: load_pedigree(dog_id, generations=generations).inbreeding(dog_id),
+        scopes=[scope(DogParent)],
+    )
+
+
+def trial_mating(sire_id: int, dam_id: int, generations: int = COI_GENERATIONS):
+    """
+    COI будущих щенков и общие предки пары.
+    Dog.DoesNotExist, если одной из собак нет в базе.
+    """
+
+    def compute():
+        pedigree = load_pedigree(sire_id, dam_id, generations=generations)
+        common = pedigree.common_ancestors(sire_id, dam_id)
+        names = dict(
+            Dog.objects.filter(pk__in=common | {sire_id, dam_id}).values_list(
+                "id", "name"
+            )
+        )
+        if sire_id not in names or dam_id not in names:
+            raise Dog.DoesNotExist
+        return {
+            "coi": pedigree.kinship(sire_id, dam_id),
+            "common_ancestors": [
+                {"id": dog_id, "name": names[dog_id]} for dog_id in sorted(common)
+            ],
+        }
+
+    low, high = sorted([sire_id, dam_id])
+    return cached(
+        "trial_mating",
+        [low, high, generations],
+        compute,
+        scopes=[scope(Dog), scope(DogParent)],
+    )
@@ -0,0 +1,101 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from dogs.models import Breed, Dog
+
+# Свой LocMem-кэш процесса: очистка перед запросом не задевает общий кэш сайта.
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bench-requests",
+    },
+}
+
+
+def conn_max_age(value: str) -> int | None:
+    """CONN_MAX_AGE из аргумента: число секунд или none — без ограничения."""
+    return None if value.strip().lower() == "none" else int(value)
+
+
+class Command(BaseCommand):
+    help = (
+        "Время ответа страниц без соединения между запросами (CONN_MAX_AGE=0) "
+        "и с постоянным соединением из настроек. Кэш (отдельный LocMem, "
+        "не кэш сайта) очищается перед каждым запросом, чтобы страница "
+        "обращалась к БД."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--conn-max-age",
+            type=conn_max_age,
+            nargs="+",
+            help=(
+                "Значения CONN_MAX_AGE для сравнения (секунды или none). "
+                "По умолчанию 0 и из настроек."
+            ),
+        )
+
+    def get_urls(self):
+        urls = [reverse("dogs:dogs_list")]
+        breed = Breed.objects.first()
+        dog = Dog.objects.first()
+        if breed:
+            urls.append(reverse("dogs:dogs_by_breed", args=[breed.pk]))
+        if dog:
+            urls.append(reverse("dogs:dog_detail", args=[dog.pk]))
+        return urls
+
+    def measure(self, client, url, count):
+        timings = []
+        for _ in range(count):
+            cache.clear()
+            started = time.perf_counter()
+            response = client.get(url, secure=True)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url}: статус {response.status_code}")
+        return timings
+
+    def handle(self, *args, **options):
+        with override_settings(CACHES=BENCH_CACHES):
+            self.run(options)
+
+    def run(self, options):
+        count = options["requests"]
+        ages = options["conn_max_age"] or [
+            0,
+            settings.DATABASES["default"]["CONN_MAX_AGE"],
+        ]
+        initial_age = connection.settings_dict["CONN_MAX_AGE"]
+        urls = self.get_urls()
+        host = settings.ALLOWED_HOSTS[0].lstrip(".")
+        client = Client(HTTP_HOST="localhost" if host == "*" else host)
+        self.stdout.write(
+            f"{connection.vendor}, {connection.settings_dict['HOST'] or 'local'}, "
+            f"{count} запросов на страницу"
+        )
+        for age in ages:
+            # Клиент шлёт request_finished: close_old_connections
+            # закрывает соединение по CONN_MAX_AGE, как в цикле запроса.
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = age
+            self.stdout.write(self.style.MIGRATE_HEADING(f"CONN_MAX_AGE={age}"))
+            for url in urls:
+                self.measure(client, url, 5)
+                timings = sorted(self.measure(client, url, count))
+                p95 = timings[int(len(timings) * 0.95) - 1]
+                self.stdout.write(
+                    f"  {url:<30} медиана {statistics.median(timings):6.2f} мс, "
+                    f"p95 {p95:6.2f} мс, среднее {statistics.fmean(timings):6.2f} мс"
+                )
+        connection.close()
+        connection.settings_dict["CONN_MAX_AGE"] = initial_age
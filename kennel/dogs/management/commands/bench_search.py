@@ -0,0 +1,107 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from dogs.models import Breed, Dog
+from dogs.search import search
+from users.models import User
+
+SYLLABLES = (
+    "ра",
+    "ко",
+    "ми",
+    "ла",
+    "тор",
+    "бей",
+    "ан",
+    "ри",
+    "зу",
+    "нок",
+    "ша",
+    "рекс",
+)
+
+
+def make_name(rng):
+    return "".join(rng.choices(SYLLABLES, k=rng.randint(2, 3))).capitalize()
+
+
+class Command(BaseCommand):
+    help = (
+        "Время поиска на синтетических данных. Данные создаются в транзакции, "
+        "которая в конце откатывается."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dogs", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=100)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def generate(self, rng, count):
+        breeds = Breed.objects.bulk_create(
+            Breed(name=f"{make_name(rng)} терьер", description="Синтетическая порода")
+            for _ in range(50)
+        )
+        owners = User.objects.bulk_create(
+            User(
+                email=f"bench{i}@example.com",
+                first_name=make_name(rng),
+                last_name=make_name(rng),
+            )
+            for i in range(count // 20)
+        )
+        Dog.objects.bulk_create(
+            (
+                Dog(
+                    name=make_name(rng),
+                    breed=rng.choice(breeds),
+                    owner=rng.choice(owners),
+                )
+                for _ in range(count)
+            ),
+            batch_size=5000,
+        )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+    def measure(self, func, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            func(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return (
+            f"медиана {statistics.median(timings):7.2f} мс, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:7.2f} мс"
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.generate(rng, options["dogs"])
+            self.stdout.write(
+                f"{connection.vendor}: {options['dogs']} собак "
+                f"за {time.perf_counter() - started:.1f} с"
+            )
+            # Префиксы имён (ввод по буквам) и имена с опечаткой.
+            queries = []
+            for _ in range(options["queries"]):
+                name = make_name(rng).lower()
+                queries.append(name[: rng.randint(2, len(name))])
+            self.stdout.write(f"search():   {self.measure(search, queries)}")
+            self.stdout.write(
+                "icontains:  "
+                + self.measure(
+                    lambda query: list(
+                        Dog.objects.filter(name__icontains=query).order_by("name")[:10]
+                    ),
+                    queries,
+                )
+            )
+            transaction.set_rollback(True)
@@ -0,0 +1,61 @@
+from django.core.management import BaseCommand
+from django.db import NotSupportedError
+
+from config.core.pagination import KeysetPaginator
+from dogs.models import Breed, Dog
+from dogs.views import DOGS_PER_PAGE
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Печатает EXPLAIN ANALYZE для запросов основных страниц."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--no-analyze",
+            action="store_true",
+            help="Только план, без выполнения запросов (EXPLAIN без ANALYZE).",
+        )
+
+    def get_queries(self):
+        """Запросы в том виде, в каком их выполняют представления."""
+        breed = Breed.objects.first()
+        dog = Dog.objects.first()
+        user = User.objects.only("email").first()
+        queries = {
+            "dogs:dogs_list": KeysetPaginator(
+                Dog.objects.for_list(), DOGS_PER_PAGE
+            ).page_queryset(),
+            "admin:dogs_dog_changelist": Dog.objects.for_admin().order_by(
+                "name", "-pk"
+            )[:100],
+        }
+        if breed:
+            queries["dogs:dogs_by_breed"] = KeysetPaginator(
+                Dog.objects.for_list().filter(breed_id=breed.pk), DOGS_PER_PAGE
+            ).page_queryset()
+        if dog:
+            queries["dogs:dog_detail"] = Dog.objects.for_detail().filter(pk=dog.pk)
+            queries["admin:dogs_dog_changelist?birth_date"] = Dog.objects.filter(
+                birth_date__gte=dog.birth_date or "2000-01-01"
+            )
+        if user:
+            queries["users:login"] = User.objects.filter(
+                email__lower=user.email.lower()
+            )
+        return queries
+
+    def handle(self, *args, **options):
+        analyze = not options["no_analyze"]
+        for name, queryset in self.get_queries().items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(str(queryset.query))
+            try:
+                plan = (
+                    queryset.explain(analyze=analyze) if analyze else queryset.explain()
+                )
+            except (ValueError, NotSupportedError):
+                # SQLite и ряд других СУБД не поддерживают ANALYZE.
+                plan = queryset.explain()
+            self.stdout.write(plan)
+            self.stdout.write("")
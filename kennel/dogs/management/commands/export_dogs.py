@@ -0,0 +1,36 @@
+import sys
+from contextlib import nullcontext
+
+from django.core.management import BaseCommand
+
+from dogs.exchange import FORMATS, dog_to_record, guess_format, iter_lines
+from dogs.models import Dog
+
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Экспорт собак (с родителями) в CSV или JSONL потоком, без загрузки таблицы в память."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу или «-» для stdout.")
+        parser.add_argument(
+            "--format", choices=FORMATS, help="По умолчанию по расширению."
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or guess_format(path)
+        dogs = (
+            Dog.objects.select_related("breed", "owner")
+            .prefetch_related("dogparent_set__breed")
+            .order_by("id")
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+        records = (dog_to_record(dog) for dog in dogs)
+        if path == "-":
+            file = nullcontext(sys.stdout)
+        else:
+            file = open(path, "w", encoding="utf-8", newline="")
+        with file as file:
+            file.writelines(iter_lines(records, file_format))
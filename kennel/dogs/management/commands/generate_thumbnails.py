@@ -0,0 +1,39 @@
+from django.core.management import BaseCommand
+
+from config.core.images import (
+    find_thumbnail_widths,
+    generate_thumbnails,
+    has_thumbnails,
+    remember_widths,
+)
+from config.core.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Создаёт миниатюры для уже загруженных фото собак, пород и профилей."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Пересоздать миниатюры, даже если они уже есть.",
+        )
+
+    def handle(self, *args, **options):
+        for model, field_name in IMAGE_FIELDS.items():
+            names = (
+                model.objects.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__isnull": True})
+                .values_list(field_name, flat=True)
+                .iterator()
+            )
+            created = 0
+            for name in names:
+                if options["force"] or not has_thumbnails(name):
+                    created += bool(generate_thumbnails(name))
+                else:
+                    # Готовые миниатюры — в кэш, чтобы страницы не проверяли хранилище.
+                    remember_widths(name, find_thumbnail_widths(name))
+            self.stdout.write(
+                self.style.SUCCESS(f"{model._meta.verbose_name_plural}: {created}")
+            )
@@ -0,0 +1,196 @@
+import sys
+from collections import Counter
+from contextlib import nullcontext
+import time
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from config.core.invalidation import bump, scope
+from config.core.validators.common import DateValidator
+from dogs.exchange import FORMATS, guess_format, parse_record, read_rows
+from dogs import breed_stats
+from dogs.facets import apply_changes, dog_facets
+from dogs.models import Breed, Dog, DogParent
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Импорт собак (с родителями) из CSV или JSONL пакетами через bulk_create. "
+        "Формат записей описан в dogs/exchange.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу или «-» для stdin.")
+        parser.add_argument(
+            "--format", choices=FORMATS, help="По умолчанию по расширению."
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--create-breeds",
+            action="store_true",
+            help="Создавать отсутствующие породы вместо пропуска строки.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только проверить строки, ничего не записывая в базу.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or guess_format(path)
+        self.batch_size = options["batch_size"]
+        self.create_breeds = options["create_breeds"]
+        self.dry_run = options["dry_run"]
+        self.breeds = {
+            name.lower(): pk for name, pk in Breed.objects.values_list("name", "id")
+        }
+        self.owners = {}
+        self.touched_breeds = set()
+        self.imported = self.skipped = 0
+        self.started = time.perf_counter()
+
+        try:
+            if path == "-":
+                file = nullcontext(sys.stdin)
+            else:
+                file = open(path, encoding="utf-8", newline="")
+        except OSError as error:
+            raise CommandError(error)
+        with file as file:
+            batch = []
+            for line_num, row in read_rows(file, file_format):
+                try:
+                    batch.append(self.build(parse_record(row, file_format)))
+                except (ValidationError, ValueError, KeyError, TypeError) as error:
+                    self.skipped += 1
+                    self.stderr.write(f"Строка {line_num}: {self.error_text(error)}")
+                    continue
+                if len(batch) >= self.batch_size:
+                    self.save_batch(batch)
+                    batch = []
+            if batch:
+                self.save_batch(batch)
+
+        if self.dry_run:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Проверено без записи: {self.imported}, "
+                    f"с ошибками: {self.skipped}."
+                )
+            )
+            return
+        bump(
+            scope(Dog),
+            scope(DogParent),
+            *(scope(Dog, breed=breed_id) for breed_id in self.touched_breeds),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импортировано: {self.imported}, пропущено: {self.skipped}, "
+                f"{self.rate():.0f} строк/с."
+            )
+        )
+        self.stdout.write("Миниатюры фото: manage.py generate_thumbnails")
+
+    @staticmethod
+    def error_text(error):
+        if isinstance(error, ValidationError):
+            return "; ".join(error.messages)
+        return str(error)
+
+    def rate(self):
+        return self.imported / max(time.perf_counter() - self.started, 1e-9)
+
+    def resolve_breed(self, name):
+        if not name:
+            raise ValueError("Не указана порода.")
+        if name.lower() not in self.breeds:
+            if not self.create_breeds:
+                raise ValueError(f"Порода «{name}» не найдена.")
+            # При проверке без записи порода только запоминается.
+            breed = None if self.dry_run else Breed.objects.create(name=name).pk
+            self.breeds[name.lower()] = breed
+        return self.breeds[name.lower()]
+
+    @staticmethod
+    def clean_name(value, label):
+        name = (value or "").strip()
+        if not 2 <= len(name) <= 30:
+            raise ValueError(f"{label} должно содержать от 2 до 30 символов.")
+        return name
+
+    @staticmethod
+    def parse_date(value):
+        if not value:
+            return None
+        return DateValidator.age_limit(date.fromisoformat(value), 35, "собаки")
+
+    def build(self, record):
+        """Собака и её родители без сохранения; ошибки данных — исключения."""
+        dog = Dog(
+            name=self.clean_name(record.get("name"), "Имя"),
+            breed_id=self.resolve_breed(record.get("breed")),
+            birth_date=self.parse_date(record.get("birth_date")),
+            photo=record.get("photo") or "",
+        )
+        dog.owner_email = (record.get("owner") or "").strip().lower()
+        parents = [
+            DogParent(
+                name=self.clean_name(parent.get("name"), "Имя родителя"),
+                breed_id=self.resolve_breed(parent.get("breed")),
+                birth_date=self.parse_date(parent.get("birth_date")),
+            )
+            for parent in record.get("parents") or []
+        ]
+        return dog, parents
+
+    def resolve_owners(self, dogs):
+        """Хозяева пакета одним запросом; найденные запоминаются на весь импорт."""
+        emails = {
+            dog.owner_email for dog in dogs if dog.owner_email
+        } - self.owners.keys()
+        if emails:
+            found = dict(
+                User.objects.filter(email__lower__in=emails).values_list("email", "id")
+            )
+            found = {email.lower(): pk for email, pk in found.items()}
+            for email in emails:
+                self.owners[email] = found.get(email)
+        for dog in dogs:
+            dog.owner_id = self.owners.get(dog.owner_email)
+
+    def save_batch(self, batch):
+        dogs = [dog for dog, _ in batch]
+        if self.dry_run:
+            self.imported += len(dogs)
+            return
+        self.resolve_owners(dogs)
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                Dog.objects.bulk_create(dogs)
+                # bulk_create не шлёт сигналов: счётчики фасетов
+                # и статистика пород — вручную.
+                apply_changes(
+                    Counter(
+                        key for dog in dogs for key in dog_facets(dog.__dict__).items()
+                    )
+                )
+                breed_stats.apply_changes(breed_stats.dogs_stats(dogs))
+            else:
+                # Без RETURNING не узнать id собак для родителей.
+                for dog in dogs:
+                    dog.save()
+            parents = []
+            for dog, dog_parents in batch:
+                for parent in dog_parents:
+                    parent.dog_id = dog.pk
+                    parents.append(parent)
+            DogParent.objects.bulk_create(parents)
+        self.touched_breeds.update(dog.breed_id for dog in dogs)
+        self.imported += len(dogs)
+        self.stdout.write(f"{self.imported} строк, {self.rate():.0f} строк/с")
@@ -0,0 +1,14 @@
+from django.core.management import BaseCommand
+
+from dogs.breed_stats import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает статистику пород (число собак, средний возраст, "
+        "последняя собака) по таблице собак."
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Пород пересчитано: {rows}."))
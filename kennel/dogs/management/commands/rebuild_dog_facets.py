@@ -0,0 +1,14 @@
+from django.core.management import BaseCommand
+
+from dogs.facets import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счётчики фасетов каталога по таблице собак "
+        "(после изменений в обход сигналов: update(), SQL)."
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Счётчиков фасетов: {rows}."))
@@ -1,10 +1,18 @@
-from django.db import models
+from datetime import date
+
+from django.db import models, transaction
 from django.conf import settings
 
 NULLABLE = {"null": True, "blank": True}
 NULLABLE_FOR_STRING = {"null": False, "blank": True}
 
 
+class BreedQuerySet(models.QuerySet):
+    def for_cards(self):
+        """Карточки пород: статистика и последняя собака в том же запросе."""
+        return self.select_related("stats", "stats__latest_dog")
+
+
 class Breed(models.Model):
     """Модель для породы."""
 
@@ -23,6 +31,8 @@ class Breed(models.Model):
         verbose_name="Фото",
     )
 
+    objects = BreedQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Порода собаки"
         verbose_name_plural = "Породы собак"
@@ -31,6 +41,34 @@ class Breed(models.Model):
         return f"{self.name}"
 
 
+class DogQuerySet(models.QuerySet):
+    """Выборки собак под конкретные страницы, без N+1 запросов."""
+
+    def for_list(self):
+        """Карточки списка: имя и фото."""
+        return self.only("id", "name", "photo")
+
+    def for_detail(self):
+        """Страница собаки: порода и контакты хозяина одним запросом."""
+        return self.select_related("breed", "owner").only(
+            "id",
+            "name",
+            "photo",
+            "birth_date",
+            "breed__id",
+            "breed__name",
+            "owner__id",
+            "owner__email",
+            "owner__first_name",
+            "owner__phone",
+            "owner__telegram",
+        )
+
+    def for_admin(self):
+        """Список в админке: порода и хозяин в одном JOIN."""
+        return self.select_related("breed", "owner")
+
+
 class Dog(models.Model):
     """Модель для собаки."""
 
@@ -59,19 +97,48 @@ class Dog(models.Model):
         verbose_name="Хозяин",
     )
 
+    objects = DogQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Собака"
         verbose_name_plural = "Собаки"
+        indexes = [
+            # Каталог и админка: ORDER BY name, id (курсорная пагинация).
+            models.Index(fields=["name", "id"], name="dogs_dog_name_id_idx"),
+            # Собаки породы: WHERE breed_id = ? ORDER BY name, id.
+            models.Index(
+                fields=["breed", "name", "id"], name="dogs_dog_breed_name_id_idx"
+            ),
+            # Фильтр по дате рождения в админке.
+            models.Index(fields=["birth_date"], name="dogs_dog_birth_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.breed})"
 
+    def save(self, *args, **kwargs):
+        # Счётчики (BreedStats, фасеты) обновляются сигналами в той же транзакции.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
 
 class DogParent(models.Model):
+    """
+    Родитель собаки. Если родитель есть в базе, parent связывает
+    собак в граф родословной (см. dogs/pedigree.py).
+    """
+
     dog = models.ForeignKey(
         Dog,
         on_delete=models.CASCADE,
     )
+    parent = models.ForeignKey(
+        Dog,
+        on_delete=models.SET_NULL,
+        related_name="child_links",
+        **NULLABLE,
+        verbose_name="Собака-родитель в базе",
+    )
     name = models.CharField(
         max_length=30,
         verbose_name="Имя родителя",
@@ -89,6 +156,97 @@ class DogParent(models.Model):
     class Meta:
         verbose_name = "Родитель собаки"
         verbose_name_plural = "Родители собаки"
+        indexes = [
+            # Родословная в форме: WHERE dog_id = ? ORDER BY id.
+            models.Index(fields=["dog", "id"], name="dogs_parent_dog_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.breed})"
+
+
+class DogFacetCount(models.Model):
+    """
+    Счётчики фасетов каталога собак (порода, месяц рождения, фото, хозяин).
+    Обновляются сигналами по изменениям собак, см. dogs/facets.py.
+    """
+
+    facet = models.CharField(
+        max_length=20,
+        verbose_name="Фасет",
+    )
+    value = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name="Значение",
+    )
+    count = models.IntegerField(
+        default=0,
+        verbose_name="Количество собак",
+    )
+
+    class Meta:
+        verbose_name = "Счётчик фасета"
+        verbose_name_plural = "Счётчики фасетов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["facet", "value"], name="dogs_facet_value_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
+
+
+class BreedStats(models.Model):
+    """
+    Денормализованная статистика породы для карточек.
+    Обновляется сигналами собак в транзакции сохранения (dogs/breed_stats.py),
+    пересчёт: manage.py rebuild_breed_stats.
+    """
+
+    breed = models.OneToOneField(
+        Breed,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Порода",
+    )
+    dog_count = models.IntegerField(
+        default=0,
+        verbose_name="Собак",
+    )
+    dated_count = models.IntegerField(
+        default=0,
+        verbose_name="Собак с датой рождения",
+    )
+    birth_ordinal_sum = models.BigIntegerField(
+        default=0,
+        verbose_name="Сумма дат рождения (дни)",
+    )
+    latest_dog = models.ForeignKey(
+        Dog,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        **NULLABLE,
+        verbose_name="Последняя добавленная собака",
+    )
+    updated_at = models.DateTimeField(
+        **NULLABLE,
+        verbose_name="Обновлено",
+    )
+
+    class Meta:
+        verbose_name = "Статистика породы"
+        verbose_name_plural = "Статистика пород"
+
+    def __str__(self):
+        return f"{self.breed_id}: {self.dog_count}"
+
+    @property
+    def average_age(self):
+        """Средний возраст в годах по собакам с датой рождения."""
+        if not self.dated_count:
+            return None
+        average = self.birth_ordinal_sum / self.dated_count
+        return (date.today().toordinal() - average) / 365.25
@@ -0,0 +1,185 @@
+"""
+Родословная: граф собак по ссылкам DogParent.parent.
+
+Предки и потомки на N поколений читаются одним запросом с рекурсивным CTE
+(PostgreSQL, SQLite, SQL Server). Результат — дерево для шаблона:
+[{"node": строка, "dog_id": id собаки в базе или None, "relatives": [...]}].
+"""
+
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import connection
+from django.db.models import Model
+from django.db.models.query import RawQuerySet
+
+from .models import Breed, Dog, DogParent
+
+GENERATIONS = 3
+MAX_GENERATIONS = 30
+
+ANCESTORS_SQL = """
+{with_recursive} tree (link_id, parent_id, depth) AS (
+    SELECT id, parent_id, 1 FROM {link} WHERE dog_id = %s
+    UNION ALL
+    SELECT l.id, l.parent_id, tree.depth + 1
+    FROM {link} l JOIN tree ON l.dog_id = tree.parent_id
+    WHERE tree.depth < %s
+)
+SELECT DISTINCT l.id, l.dog_id, l.parent_id, l.name, l.birth_date, l.breed_id,
+       b.name AS breed_name, tree.depth
+FROM tree
+JOIN {link} l ON l.id = tree.link_id
+JOIN {breed} b ON b.id = l.breed_id
+ORDER BY tree.depth, l.id
+"""
+
+DESCENDANTS_SQL = """
+{with_recursive} tree (dog_id, parent_id, depth) AS (
+    SELECT dog_id, parent_id, 1 FROM {link} WHERE parent_id = %s
+    UNION ALL
+    SELECT l.dog_id, l.parent_id, tree.depth + 1
+    FROM {link} l JOIN tree ON l.parent_id = tree.dog_id
+    WHERE tree.depth < %s
+)
+SELECT DISTINCT d.id, d.name, d.birth_date, d.breed_id,
+       b.name AS breed_name, tree.parent_id AS origin_id, tree.depth
+FROM tree
+JOIN {dog} d ON d.id = tree.dog_id
+JOIN {breed} b ON b.id = d.breed_id
+ORDER BY tree.depth, d.name, d.id
+"""
+
+# Достижимость без глубины: UNION отбрасывает уже найденных собак, поэтому
+# каждая попадает в CTE один раз — запрос линеен по числу связей
+# (UNION ALL с depth растёт экспоненциально на общих предках) и завершается
+# даже на цикле.
+REACHABLE_SQL = """
+WITH RECURSIVE reachable (dog_id) AS (
+    SELECT dog_id FROM {link} WHERE parent_id = %s
+    UNION
+    SELECT l.dog_id FROM {link} l JOIN reachable ON l.parent_id = reachable.dog_id
+)
+SELECT dog_id FROM reachable
+"""
+
+ANCESTOR_EDGES_SQL = """
+{with_recursive} tree (link_id, dog_id, parent_id, depth) AS (
+    SELECT id, dog_id, parent_id, 1 FROM {link}
+    WHERE dog_id IN ({roots}) AND parent_id IS NOT NULL
+    UNION ALL
+    SELECT l.id, l.dog_id, l.parent_id, tree.depth + 1
+    FROM {link} l JOIN tree ON l.dog_id = tree.parent_id
+    WHERE tree.depth < %s AND l.parent_id IS NOT NULL
+)
+SELECT DISTINCT link_id, dog_id, parent_id FROM tree ORDER BY link_id
+"""
+
+
+def format_sql(sql: str, **kwargs) -> str:
+    quote = connection.ops.quote_name
+    return sql.format(
+        **kwargs,
+        # SQL Server не знает RECURSIVE, рекурсию он определяет сам.
+        with_recursive="WITH" if connection.vendor == "microsoft" else "WITH RECURSIVE",
+        link=quote(DogParent._meta.db_table),
+        dog=quote(Dog._meta.db_table),
+        breed=quote(Breed._meta.db_table),
+    )
+
+
+def ancestor_rows(dog_id: int, generations: int = GENERATIONS) -> RawQuerySet:
+    """Записи DogParent предков с атрибутами depth и breed_name."""
+    return DogParent.objects.raw(
+        format_sql(ANCESTORS_SQL), [dog_id, min(generations, MAX_GENERATIONS)]
+    )
+
+
+def descendant_rows(dog_id: int, generations: int = GENERATIONS) -> RawQuerySet:
+    """Собаки-потомки с атрибутами depth, breed_name и origin_id (родитель)."""
+    return Dog.objects.raw(
+        format_sql(DESCENDANTS_SQL), [dog_id, min(generations, MAX_GENERATIONS)]
+    )
+
+
+def build_tree(rows: list[Model], root_id: int, origin: str, relative: str) -> list:
+    """
+    Дерево из плоских строк CTE.
+    origin — атрибут строки со ссылкой на предыдущее поколение,
+    relative — атрибут с id собаки, от которой растёт следующее.
+    """
+    levels = defaultdict(list)
+    for row in rows:
+        levels[getattr(row, origin), row.depth].append(row)
+
+    def branch(origin_id, depth):
+        return [
+            {
+                "node": row,
+                "dog_id": getattr(row, relative),
+                "relatives": branch(getattr(row, relative), depth + 1),
+            }
+            for row in levels[origin_id, depth]
+        ]
+
+    return branch(root_id, 1)
+
+
+def ancestry_tree(dog_id: int, generations: int = GENERATIONS) -> list:
+    return build_tree(
+        list(ancestor_rows(dog_id, generations)), dog_id, "dog_id", "parent_id"
+    )
+
+
+def descendant_tree(dog_id: int, generations: int = GENERATIONS) -> list:
+    return build_tree(
+        list(descendant_rows(dog_id, generations)), dog_id, "origin_id", "pk"
+    )
+
+
+async def aancestry_tree(dog_id: int, generations: int = GENERATIONS) -> list:
+    rows = [row async for row in ancestor_rows(dog_id, generations)]
+    return build_tree(rows, dog_id, "dog_id", "parent_id")
+
+
+async def adescendant_tree(dog_id: int, generations: int = GENERATIONS) -> list:
+    rows = [row async for row in descendant_rows(dog_id, generations)]
+    return build_tree(rows, dog_id, "origin_id", "pk")
+
+
+def descendant_ids(dog_id: int) -> set[int]:
+    """
+    Все потомки собаки (для проверки циклов в родословной).
+    SQL Server не допускает UNION в рекурсивном CTE — там обход
+    по поколениям, запрос на поколение.
+    """
+    if connection.vendor == "microsoft":
+        found, generation = set(), {dog_id}
+        while generation:
+            generation = (
+                set(
+                    DogParent.objects.filter(parent_id__in=generation).values_list(
+                        "dog_id", flat=True
+                    )
+                )
+                - found
+            )
+            found |= generation
+        return found
+    with connection.cursor() as cursor:
+        cursor.execute(format_sql(REACHABLE_SQL), [dog_id])
+        return {dog_id for dog_id, in cursor.fetchall()}
+
+
+def ancestor_edges(
+    dog_ids: Iterable[int], generations: int = GENERATIONS
+) -> dict[int, list[int]]:
+    """Подграф предков одним запросом: id собаки -> id её родителей в базе."""
+    dog_ids = list(dog_ids)
+    sql = format_sql(ANCESTOR_EDGES_SQL, roots=", ".join(["%s"] * len(dog_ids)))
+    parents = defaultdict(list)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*dog_ids, min(generations, MAX_GENERATIONS)])
+        for _, dog_id, parent_id in cursor.fetchall():
+            parents[dog_id].append(parent_id)
+    return dict(parents)
@@ -0,0 +1,189 @@
+"""
+Поиск по собакам, породам и хозяевам.
+
+PostgreSQL: полнотекстовый поиск по префиксам слов (to_tsvector/GIN)
+и нечёткое совпадение имён через pg_trgm. Триграммные индексы построены
+по UPPER(поле), как icontains в Django, и ускоряют также поиск в админке.
+Индексы создаются после migrate (create_search_indexes).
+Прочие СУБД: поиск подстроки (icontains). В SQLite регистр не учитывается
+только для латиницы, поэтому ищем и строку запроса, и её вариант с заглавной.
+"""
+
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import F, Q, QuerySet
+from django.db.models.functions import Greatest, Upper
+
+from users.models import User
+from .models import Breed, Dog
+
+MIN_QUERY_LENGTH = 2
+DOGS_LIMIT = 10
+BREEDS_LIMIT = 5
+DOG_SEARCH_CONFIG = "simple"
+BREED_SEARCH_CONFIG = "russian"
+WORD_RE = re.compile(r"\w+")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(WORD_RE.findall(query.lower()))[:100]
+
+
+def contains(field: str, query: str) -> Q:
+    """Поиск подстроки без учёта регистра там, где нет pg_trgm."""
+    condition = Q()
+    for variant in {query, query.capitalize()}:
+        condition |= Q(**{f"{field}__icontains": variant})
+    return condition
+
+
+def search_indexes() -> dict:
+    """GIN-индексы поиска; выражения совпадают с запросами ниже."""
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+    from django.contrib.postgres.search import SearchVector
+
+    def trigram(name, field):
+        return GinIndex(OpClass(Upper(field), name="gin_trgm_ops"), name=name)
+
+    return {
+        Dog: [
+            trigram("dogs_dog_name_trgm_idx", "name"),
+            GinIndex(
+                SearchVector("name", config=DOG_SEARCH_CONFIG),
+                name="dogs_dog_name_fts_idx",
+            ),
+        ],
+        Breed: [
+            trigram("dogs_breed_name_trgm_idx", "name"),
+            GinIndex(
+                SearchVector("name", "description", config=BREED_SEARCH_CONFIG),
+                name="dogs_breed_fts_idx",
+            ),
+        ],
+        User: [
+            trigram("users_user_first_name_trgm_idx", "first_name"),
+            trigram("users_user_last_name_trgm_idx", "last_name"),
+        ],
+    }
+
+
+def create_search_indexes(using=DEFAULT_DB_ALIAS, **kwargs) -> None:
+    """post_migrate: расширение pg_trgm и недостающие индексы поиска."""
+    db = connections[using]
+    if db.vendor != "postgresql":
+        return
+    with db.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        existing = {
+            model: db.introspection.get_constraints(cursor, model._meta.db_table)
+            for model in search_indexes()
+        }
+    with db.schema_editor() as editor:
+        for model, indexes in search_indexes().items():
+            for index in indexes:
+                if index.name not in existing[model]:
+                    editor.add_index(model, index)
+
+
+def prefix_query(query: str, config: str):
+    """«рекс бул» -> to_tsquery('рекс:* & бул:*'): поиск по мере ввода."""
+    from django.contrib.postgres.search import SearchQuery
+
+    raw = " & ".join(f"{word}:*" for word in query.split())
+    return SearchQuery(raw, config=config, search_type="raw")
+
+
+def search_dogs_by_owner(query: str, limit: int = DOGS_LIMIT) -> QuerySet:
+    """
+    Собаки хозяев с подходящим именем.
+    Отдельный запрос: OR через JOIN не дал бы использовать индексы.
+    """
+    if connection.vendor == "postgresql":
+        condition = Q(first_name__icontains=query) | Q(last_name__icontains=query)
+    else:
+        condition = contains("first_name", query) | contains("last_name", query)
+    owners = User.objects.filter(condition)
+    return (
+        Dog.objects.for_list().filter(owner__in=owners).order_by("name", "id")[:limit]
+    )
+
+
+def search_dogs(query: str, limit: int = DOGS_LIMIT) -> QuerySet:
+    """Собаки по имени: полнотекстово по префиксам и нечётко."""
+    dogs = Dog.objects.for_list()
+    if connection.vendor != "postgresql":
+        return dogs.filter(contains("name", query)).order_by("name", "id")[:limit]
+
+    from django.contrib.postgres.search import (
+        SearchRank,
+        SearchVector,
+        TrigramSimilarity,
+    )
+
+    vector = SearchVector("name", config=DOG_SEARCH_CONFIG)
+    ts_query = prefix_query(query, DOG_SEARCH_CONFIG)
+    return (
+        dogs.alias(name_upper=Upper("name"))
+        .annotate(
+            search=vector,
+            score=Greatest(
+                SearchRank(vector, ts_query),
+                TrigramSimilarity("name", query),
+            ),
+        )
+        .filter(Q(search=ts_query) | Q(name_upper__trigram_similar=query.upper()))
+        .order_by(F("score").desc(), "name", "id")[:limit]
+    )
+
+
+def search_breeds(query: str, limit: int = BREEDS_LIMIT) -> QuerySet:
+    """Породы по названию (нечётко) и описанию (полнотекстово)."""
+    breeds = Breed.objects.only("id", "name", "photo")
+    if connection.vendor != "postgresql":
+        return breeds.filter(contains("name", query)).order_by("name", "id")[:limit]
+
+    from django.contrib.postgres.search import (
+        SearchRank,
+        SearchVector,
+        TrigramSimilarity,
+    )
+
+    vector = SearchVector("name", "description", config=BREED_SEARCH_CONFIG)
+    ts_query = prefix_query(query, BREED_SEARCH_CONFIG)
+    return (
+        breeds.alias(name_upper=Upper("name"))
+        .annotate(
+            search=vector,
+            score=Greatest(
+                SearchRank(vector, ts_query),
+                TrigramSimilarity("name", query),
+            ),
+        )
+        .filter(Q(search=ts_query) | Q(name_upper__trigram_similar=query.upper()))
+        .order_by(F("score").desc(), "name", "id")[:limit]
+    )
+
+
+def merge(results: list, extra: list, limit: int) -> list:
+    seen = {obj.pk for obj in results}
+    return (results + [obj for obj in extra if obj.pk not in seen])[:limit]
+
+
+def search(query: str) -> dict:
+    """Результаты для выпадающего списка: собаки и породы."""
+    return {
+        "dogs": merge(
+            list(search_dogs(query)), list(search_dogs_by_owner(query)), DOGS_LIMIT
+        ),
+        "breeds": list(search_breeds(query)),
+    }
+
+
+async def asearch(query: str) -> dict:
+    by_name = [dog async for dog in search_dogs(query)]
+    by_owner = [dog async for dog in search_dogs_by_owner(query)]
+    return {
+        "dogs": merge(by_name, by_owner, DOGS_LIMIT),
+        "breeds": [breed async for breed in search_breeds(query)],
+    }
@@ -1,5 +1,7 @@
 from django import template
 
+from config.core.images import srcset
+
 register = template.Library()
 
 
@@ -8,3 +10,9 @@ def breeds_media(val):
     if val:
         return f"/media/{val}"
     return "/dogs/images/default-dog.jpg"
+
+
+@register.filter
+def breeds_srcset(val, ext="webp"):
+    """srcset миниатюр фото породы (webp или jpg)."""
+    return srcset(val, ext)
@@ -1,3 +1,939 @@
-from django.test import TestCase
+import json
+import operator
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.http import QueryDict
+from django.db import connection, router, transaction
+from django.contrib.sessions.models import Session
+from django.db.models.signals import post_init
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from config.core.export import stream_export
+from config.core.images import (
+    delete_image,
+    generate_thumbnails,
+    has_thumbnails,
+    srcset,
+)
+from config.core.pagination import KeysetPaginator
+from config.core.routers import PIN_COOKIE, PRIMARY, ReplicaRouter, primary
+from config.core.tasks import ThreadPoolBroker, enqueue, get_broker
+from users.models import User
+from . import breed_stats
+from .facets import filter_dogs, load_counts, rebuild, sidebar
+from .forms import DogForm, DogParentAdminForm, DogParentForm
+from .inbreeding import Pedigree
+from .models import Breed, BreedStats, Dog, DogParent
+from .pedigree import ancestry_tree, descendant_ids, descendant_tree
+
+
+class DogQueryCountTest(TestCase):
+    """Число запросов на страницах собак не зависит от числа строк."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.breed = Breed.objects.create(name="Бульдог")
+        cls.admin = User.objects.create(
+            email="admin@test.ru", is_staff=True, is_superuser=True
+        )
+
+    def create_dogs(self, count):
+        for i in range(count):
+            owner = User.objects.create(email=f"owner{Dog.objects.count()}@test.ru")
+            Dog.objects.create(name=f"Dog{i}", breed=self.breed, owner=owner)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def assertConstantQueries(self, url):
+        self.create_dogs(1)
+        few = self.count_queries(url)
+        self.create_dogs(10)
+        self.assertEqual(self.count_queries(url), few)
+
+    def test_dogs_list(self):
+        self.assertConstantQueries(reverse("dogs:dogs_list"))
+
+    def test_dogs_by_breed(self):
+        self.assertConstantQueries(reverse("dogs:dogs_by_breed", args=[self.breed.pk]))
+
+    def test_admin_changelist(self):
+        self.client.force_login(self.admin)
+        self.assertConstantQueries(reverse("admin:dogs_dog_changelist"))
+
+    def test_dog_detail(self):
+        self.create_dogs(1)
+        dog = Dog.objects.get()
+        cache.clear()
+        # Собака, предки и потомки.
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse("dogs:dog_detail", args=[dog.pk]), secure=True
+            )
+        self.assertContains(response, dog.owner.email)
+
+
+class PublicCacheTest(TestCase):
+    """Публичные страницы отдаются из кэша и сбрасываются сигналами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.breed = Breed.objects.create(name="Бульдог")
+        cls.dog = Dog.objects.create(name="Рекс", breed=cls.breed)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_cached(self):
+        urls = [
+            reverse("dogs:index"),
+            reverse("dogs:breeds"),
+            reverse("dogs:dogs_list"),
+            reverse("dogs:dogs_by_breed", args=[self.breed.pk]),
+            reverse("dogs:dog_detail", args=[self.dog.pk]),
+        ]
+        for url in urls:
+            self.client.get(url, secure=True)
+            with self.assertNumQueries(0):
+                self.client.get(url, secure=True)
+
+    def test_breed_save_invalidates(self):
+        self.client.get(reverse("dogs:breeds"), secure=True)
+        self.breed.name = "Мопс"
+        self.breed.save()
+        self.assertContains(
+            self.client.get(reverse("dogs:breeds"), secure=True), "Мопс"
+        )
+
+    def test_dog_save_invalidates(self):
+        url = reverse("dogs:dogs_by_breed", args=[self.breed.pk])
+        self.client.get(url, secure=True)
+        Dog.objects.create(name="Шарик", breed=self.breed)
+        self.assertContains(self.client.get(url, secure=True), "Шарик")
+
+    def test_other_breed_edit_keeps_cache(self):
+        url = reverse("dogs:dogs_by_breed", args=[self.breed.pk])
+        self.client.get(url, secure=True)
+        other = Breed.objects.create(name="Мопс")
+        Dog.objects.create(name="Шарик", breed=other)
+        other.save()
+        with self.assertNumQueries(0):
+            self.client.get(url, secure=True)
+
+    def test_dog_breed_change_invalidates_both(self):
+        other = Breed.objects.create(name="Мопс")
+        old_url = reverse("dogs:dogs_by_breed", args=[self.breed.pk])
+        self.client.get(old_url, secure=True)
+        self.dog.breed = other
+        self.dog.save()
+        self.assertNotContains(self.client.get(old_url, secure=True), "Рекс")
+
+
+class AsyncViewsTest(TestCase):
+    """Публичные страницы работают под ASGI с авторизованным пользователем."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(email="owner@test.ru")
+        cls.breed = Breed.objects.create(name="Бульдог")
+        cls.dog = Dog.objects.create(name="Рекс", breed=cls.breed, owner=cls.owner)
+
+    async def test_pages_for_logged_in_user(self):
+        await self.async_client.aforce_login(self.owner)
+        urls = [
+            reverse("dogs:index"),
+            reverse("dogs:breeds"),
+            reverse("dogs:dogs_list"),
+            reverse("dogs:dogs_by_breed", args=[self.breed.pk]),
+            reverse("dogs:dog_detail", args=[self.dog.pk]),
+        ]
+        for url in urls:
+            response = await self.async_client.get(url, secure=True)
+            self.assertContains(response, "owner@test.ru")
+        self.assertContains(response, reverse("dogs:dog_update", args=[self.dog.pk]))
+
+
+class KeysetPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        breed = Breed.objects.create(name="Бульдог")
+        # Одинаковые имена: порядок внутри них задаёт id.
+        for name in ["Бим", "Рекс", "Рекс", "Рекс", "Альма"]:
+            Dog.objects.create(name=name, breed=breed)
+        cls.ordered = list(Dog.objects.order_by("name", "id"))
+
+    def paginate(self, per_page):
+        paginator = KeysetPaginator(Dog.objects.all(), per_page)
+        pages, cursor = [], None
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append(page)
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPaginator(Dog.objects.all(), 2)
+        values = ["Рекс", self.ordered[2].pk]
+        self.assertEqual(
+            paginator.decode_cursor(paginator.encode_cursor(values)), values
+        )
+        pages = self.paginate(2)
+        self.assertEqual([len(page.object_list) for page in pages], [2, 2, 1])
+        dogs = [dog for page in pages for dog in page.object_list]
+        self.assertEqual(dogs, self.ordered)
+
+    def test_after_keeps_ties(self):
+        paginator = KeysetPaginator(Dog.objects.all(), 2)
+        first_rex = self.ordered[2]
+        after = Dog.objects.filter(paginator._after(["Рекс", first_rex.pk]))
+        self.assertEqual(list(after.order_by("name", "id")), self.ordered[3:])
+
+    def test_last_full_page_has_no_next(self):
+        pages = self.paginate(5)
+        self.assertEqual(len(pages), 1)
+        self.assertFalse(pages[0].has_next)
+        self.assertIsNone(pages[0].next_url)
+
+    def test_garbage_cursor_not_found(self):
+        paginator = KeysetPaginator(Dog.objects.all(), 2)
+        cursors = [
+            "!!!",
+            "bm90LWpzb24",
+            paginator.encode_cursor(["Рекс"]),
+            paginator.encode_cursor(["Рекс", "abc"]),
+            paginator.encode_cursor([["Рекс"], {"id": 1}]),
+        ]
+        for cursor in cursors:
+            response = self.client.get(
+                reverse("dogs:dogs_list"), {"cursor": cursor}, secure=True
+            )
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+class ThumbnailTest(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, THUMBNAIL_WIDTHS=(200, 400, 800)
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(cache.clear)
+
+    def save_photo(self, width):
+        buffer = BytesIO()
+        Image.new("RGB", (width, width // 2), "white").save(buffer, "JPEG")
+        return default_storage.save("dogs/rex.jpg", ContentFile(buffer.getvalue()))
+
+    def test_no_srcset_before_thumbnails(self):
+        name = self.save_photo(1000)
+        self.assertEqual(srcset(name), "")
+
+    def test_widths_larger_than_photo_skipped(self):
+        name = self.save_photo(500)
+        saved = generate_thumbnails(name)
+        self.assertEqual(len(saved), 4)
+        self.assertTrue(has_thumbnails(name))
+        self.assertEqual(
+            srcset(name),
+            "/media/dogs/rex_200w.webp 200w, /media/dogs/rex_400w.webp 400w",
+        )
+        with default_storage.open("dogs/rex_400w.jpg") as file:
+            self.assertEqual(Image.open(file).width, 400)
+
+    def test_small_photo_keeps_smallest_width(self):
+        name = self.save_photo(100)
+        generate_thumbnails(name)
+        self.assertEqual(srcset(name, "jpg"), "/media/dogs/rex_200w.jpg 200w")
+
+    def test_srcset_does_not_touch_storage(self):
+        name = self.save_photo(500)
+        generate_thumbnails(name)
+        with mock.patch.object(default_storage, "exists") as exists:
+            srcset(name)
+            srcset(name, "jpg")
+        exists.assert_not_called()
+
+
+class TasksTest(TestCase):
+    @override_settings(TASKS_BROKER="config.core.tasks.ImmediateBroker")
+    def test_enqueue_runs_after_commit(self):
+        get_broker.cache_clear()
+        self.addCleanup(get_broker.cache_clear)
+        calls = []
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(calls.append, "commit")
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ["commit"])
+
+    def test_rollback_drops_task(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    enqueue(print, "rollback")
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(callbacks, [])
+
+    def test_thread_pool_logs_errors(self):
+        broker = ThreadPoolBroker(max_workers=1)
+        calls = []
+        with self.assertLogs("config.core.tasks", "ERROR"):
+            broker.enqueue(operator.truediv, 1, 0)
+            broker.enqueue(calls.append, "done")
+            broker.executor.shutdown(wait=True)
+        self.assertEqual(calls, ["done"])
+
+
+class PhotoReplaceTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.dog = Dog.objects.create(
+            name="Рекс",
+            breed=Breed.objects.create(name="Бульдог"),
+            photo="dogs/old.jpg",
+        )
+
+    def submit(self, name):
+        buffer = BytesIO()
+        Image.new("RGB", (10, 10)).save(buffer, "JPEG")
+        photo = SimpleUploadedFile("new.jpg", buffer.getvalue(), "image/jpeg")
+        data = {"name": name, "breed": self.dog.breed_id}
+        form = DogForm(data, {"photo": photo}, instance=self.dog)
+        with mock.patch("config.core.validators.common.enqueue") as enqueue_task:
+            if form.is_valid():
+                form.save()
+        return enqueue_task
+
+    def test_invalid_form_keeps_old_photo(self):
+        self.submit("Р").assert_not_called()
+
+    def test_saved_form_deletes_old_photo(self):
+        self.submit("Рексик").assert_called_once_with(delete_image, "dogs/old.jpg")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1", "replica_2"])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.router.health = {
+            "replica_1": (True, float("inf")),
+            "replica_2": (True, float("inf")),
+        }
+
+    def test_reads_round_robin(self):
+        reads = {self.router.db_for_read(Dog) for _ in range(4)}
+        self.assertEqual(reads, {"replica_1", "replica_2"})
+        self.assertEqual(self.router.db_for_read(Session), "default")
+        self.assertEqual(self.router.db_for_write(Dog), "default")
+
+    def test_unhealthy_replica_skipped(self):
+        self.router.health["replica_1"] = (False, float("inf"))
+        reads = {self.router.db_for_read(Dog) for _ in range(4)}
+        self.assertEqual(reads, {"replica_2"})
+        self.router.health["replica_2"] = (False, float("inf"))
+        self.assertEqual(self.router.db_for_read(Dog), "default")
+
+    def test_users_read_from_primary(self):
+        self.assertEqual(self.router.db_for_read(User), "default")
+
+    def test_primary_block(self):
+        with primary():
+            self.assertEqual(self.router.db_for_read(Dog), "default")
+
+
+class PinPrimaryTest(TestCase):
+    def test_write_pins_primary(self):
+        user = User.objects.create(email="owner@test.ru")
+        breed = Breed.objects.create(name="Бульдог")
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("dogs:dog_create"),
+            {"name": "Рекс", "breed": breed.pk},
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaLagTest(TransactionTestCase):
+    """
+    Реплика отстаёт: чтения, которые роутер отправил бы на неё,
+    выполняются в основной БД, но запоминаются в stale_reads.
+    TransactionTestCase — вне транзакции теста роутер выбирает реплики.
+    """
+
+    def setUp(self):
+        self.stale_reads = []
+        replica_router = next(r for r in router.routers if isinstance(r, ReplicaRouter))
+        db_for_read = replica_router.db_for_read
+
+        def lagging_db_for_read(model, **hints):
+            alias = db_for_read(model, **hints)
+            if alias != PRIMARY:
+                self.stale_reads.append(model)
+            return PRIMARY
+
+        replica_router.health["replica"] = (True, float("inf"))
+        self.addCleanup(replica_router.health.pop, "replica")
+        patcher = mock.patch.object(replica_router, "db_for_read", lagging_db_for_read)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_user_flows_read_primary(self):
+        response = self.client.post(
+            reverse("users:register"),
+            {
+                "email": "new@test.ru",
+                "password1": "Password-1",
+                "password2": "Password-1",
+            },
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 302)
+        response = self.client.post(
+            reverse("users:login"),
+            {"email": "new@test.ru", "password": "Password-1"},
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 302)
+        response = self.client.post(
+            reverse("users:password-change"),
+            {
+                "old_password": "Password-1",
+                "new_password1": "Password-2",
+                "new_password2": "Password-2",
+            },
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(User, self.stale_reads)
+
+    def test_delete_pins_primary(self):
+        user = User.objects.create(email="owner@test.ru")
+        dog = Dog.objects.create(
+            name="Рекс", breed=Breed.objects.create(name="Бульдог"), owner=user
+        )
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("dogs:dog_delete", args=[dog.pk]), secure=True
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.stale_reads.clear()
+        self.client.get(reverse("dogs:dogs_list"), secure=True)
+        self.assertNotIn(Dog, self.stale_reads)
+
+
+class PedigreeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        breed = Breed.objects.create(name="Бульдог")
+        cls.grandpa = Dog.objects.create(name="Дед", breed=breed)
+        cls.father = Dog.objects.create(name="Отец", breed=breed)
+        cls.puppy = Dog.objects.create(name="Щенок", breed=breed)
+        DogParent.objects.create(
+            dog=cls.father, parent=cls.grandpa, name="Дед", breed=breed
+        )
+        DogParent.objects.create(
+            dog=cls.puppy, parent=cls.father, name="Отец", breed=breed
+        )
+        DogParent.objects.create(dog=cls.puppy, name="Мать", breed=breed)
+
+    def test_ancestry_tree_single_query(self):
+        with self.assertNumQueries(1):
+            tree = ancestry_tree(self.puppy.pk)
+        self.assertEqual([b["node"].name for b in tree], ["Отец", "Мать"])
+        self.assertEqual(tree[0]["relatives"][0]["dog_id"], self.grandpa.pk)
+        self.assertIsNone(tree[1]["dog_id"])
+
+    def test_descendant_tree(self):
+        tree = descendant_tree(self.grandpa.pk)
+        self.assertEqual(tree[0]["node"].pk, self.father.pk)
+        self.assertEqual(tree[0]["relatives"][0]["node"].pk, self.puppy.pk)
+        self.assertEqual(
+            descendant_tree(self.grandpa.pk, generations=1)[0]["relatives"], []
+        )
+
+    def test_detail_renders_pedigree(self):
+        response = self.client.get(
+            reverse("dogs:dog_detail", args=[self.father.pk]), secure=True
+        )
+        self.assertContains(response, "Предки")
+        self.assertContains(response, reverse("dogs:dog_detail", args=[self.puppy.pk]))
+
+    def test_cycle_rejected(self):
+        form = DogParentForm(
+            {"parent": self.puppy.pk}, instance=DogParent(dog=self.grandpa)
+        )
+        self.assertFalse(form.is_valid())
+
+    def test_descendant_ids_shared_ancestors_and_cycle(self):
+        # Щенок — потомок деда по двум путям, цикл Щенок -> Дед.
+        breed = self.grandpa.breed
+        DogParent.objects.create(
+            dog=self.puppy, parent=self.grandpa, name="Дед", breed=breed
+        )
+        DogParent.objects.create(
+            dog=self.grandpa, parent=self.puppy, name="Щенок", breed=breed
+        )
+        with self.assertNumQueries(1):
+            ids = descendant_ids(self.grandpa.pk)
+        self.assertEqual(ids, {self.grandpa.pk, self.father.pk, self.puppy.pk})
+
+    def test_admin_cycle_rejected(self):
+        form = DogParentAdminForm(
+            {
+                "dog": self.grandpa.pk,
+                "parent": self.puppy.pk,
+                "name": "Щенок",
+                "breed": self.grandpa.breed_id,
+            }
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("parent", form.errors)
+
+
+class DogUpdateViewTest(TestCase):
+    """Родословная сохраняется пакетно, запросы не зависят от числа родителей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(email="owner@test.ru")
+        cls.breed = Breed.objects.create(name="Бульдог")
+        cls.dog = Dog.objects.create(name="Рекс", breed=cls.breed, owner=cls.owner)
+        cls.sire = Dog.objects.create(name="Отец", breed=cls.breed)
+        cls.url = reverse("dogs:dog_update", args=[cls.dog.pk])
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def add_parents(self, count):
+        for i in range(count):
+            DogParent.objects.create(
+                dog=self.dog, name=f"Родитель{i}", breed=self.breed
+            )
+
+    def post_data(self, **changes):
+        formset = self.client.get(self.url, secure=True).context["formset"]
+        data = {"name": "Рекс", "breed": self.breed.pk, "birth_date": ""}
+        for key, value in formset.management_form.initial.items():
+            data[f"{formset.prefix}-{key}"] = value
+        for i, form in enumerate(formset.forms):
+            for name, value in form.initial.items():
+                if value is not None:
+                    data[f"{formset.prefix}-{i}-{name}"] = getattr(value, "pk", value)
+        data.update({f"{formset.prefix}-{key}": v for key, v in changes.items()})
+        return data
+
+    def count_queries(self, method, *args):
+        with CaptureQueriesContext(connection) as context:
+            response = method(self.url, *args, secure=True)
+        return response, len(context)
+
+    def test_queries_do_not_grow_with_parents(self):
+        self.add_parents(1)
+        _, get_one = self.count_queries(self.client.get)
+        _, post_one = self.count_queries(
+            self.client.post,
+            self.post_data(**{"0-name": "Новое", "1-parent": self.sire.pk}),
+        )
+        self.add_parents(3)
+        _, get_many = self.count_queries(self.client.get)
+        extra = DogParent.objects.filter(dog=self.dog).count()
+        data = self.post_data(**{"0-name": "Другое", f"{extra}-parent": self.sire.pk})
+        response, post_many = self.count_queries(self.client.post, data)
+        self.assertEqual(get_one, get_many)
+        self.assertEqual(post_one, post_many)
+        self.assertRedirects(
+            response,
+            reverse("dogs:dog_detail", args=[self.dog.pk]),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(
+            DogParent.objects.filter(dog=self.dog, parent=self.sire).count(), 2
+        )
+
+    def test_dog_fetched_once_without_owner(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        selects = [q["sql"] for q in context.captured_queries]
+        self.assertEqual(len([q for q in selects if 'FROM "dogs_dog"' in q]), 1)
+        self.assertEqual(len([q for q in selects if 'FROM "users_user"' in q]), 1)
+
+    def test_other_user_rejected(self):
+        self.client.force_login(User.objects.create(email="other@test.ru"))
+        self.assertEqual(self.client.get(self.url, secure=True).status_code, 403)
+        abort_url = reverse("dogs:dog_delete_abort", args=[self.dog.pk])
+        self.assertEqual(self.client.get(abort_url, secure=True).status_code, 404)
+
+    def test_invalid_formset_rerenders(self):
+        self.add_parents(1)
+        data = self.post_data(**{"0-name": "", "0-breed": ""})
+        data["name"] = "Новое имя"
+        response = self.client.post(self.url, data, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Укажите родителя из базы")
+        self.dog.refresh_from_db()
+        self.assertEqual(self.dog.name, "Рекс")
+
+    def test_tampered_parent_id_rejected(self):
+        self.add_parents(1)
+        foreign = DogParent.objects.create(
+            dog=self.sire, name="Чужой", breed=self.breed
+        )
+        for tampered in (foreign.pk, foreign.pk + 100):
+            data = self.post_data(**{"0-id": tampered, "0-name": "Подмена"})
+            response = self.client.post(self.url, data, secure=True)
+            self.assertEqual(response.status_code, 200)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.name, "Чужой")
+        self.assertFalse(DogParent.objects.filter(name="Подмена").exists())
+
+
+class InbreedingTest(SimpleTestCase):
+    # 1, 2, 3 — основатели; 4 и 5 — полусибсы от 1; 6 — сын 4 и 3.
+    pedigree = Pedigree({4: [1, 2], 5: [1, 3], 6: [4, 3], 7: [4, 5]})
+
+    def test_kinship(self):
+        self.assertEqual(self.pedigree.kinship(1, 1), 0.5)
+        self.assertEqual(self.pedigree.kinship(4, 5), 0.125)
+        self.assertEqual(self.pedigree.kinship(1, 4), 0.25)
+        self.assertEqual(self.pedigree.kinship(2, 3), 0.0)
+
+    def test_inbreeding(self):
+        self.assertEqual(self.pedigree.inbreeding(7), 0.125)
+        self.assertEqual(self.pedigree.inbreeding(6), 0.0)
+        self.assertEqual(self.pedigree.common_ancestors(4, 5), {1})
+
+
+class TrialMatingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        breed = Breed.objects.create(name="Бульдог")
+        sire, dam1, dam2 = (
+            Dog.objects.create(name=name, breed=breed)
+            for name in ("Отец", "Мать1", "Мать2")
+        )
+        cls.son = Dog.objects.create(name="Сын", breed=breed)
+        cls.daughter = Dog.objects.create(name="Дочь", breed=breed)
+        for child, parents in ((cls.son, [sire, dam1]), (cls.daughter, [sire, dam2])):
+            for parent in parents:
+                DogParent.objects.create(
+                    dog=child, parent=parent, name=parent.name, breed=breed
+                )
+        cls.sire = sire
+
+    def test_half_siblings(self):
+        response = self.client.get(
+            reverse("dogs:trial_mating"),
+            {"sire": self.son.pk, "dam": self.daughter.pk},
+            secure=True,
+        )
+        data = response.json()
+        self.assertEqual(data["coi"], 0.125)
+        self.assertEqual(data["sire_coi"], 0.0)
+        self.assertEqual(
+            data["common_ancestors"], [{"id": self.sire.pk, "name": "Отец"}]
+        )
+
+    def test_unknown_dog(self):
+        response = self.client.get(
+            reverse("dogs:trial_mating"), {"sire": self.son.pk, "dam": 0}, secure=True
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        breed = Breed.objects.create(name="Бульдог")
+        owner = User.objects.create(email="owner@test.ru", first_name="Иван")
+        Dog.objects.create(name="Рекс", breed=breed, owner=owner)
+        Dog.objects.create(name="Шарик", breed=breed)
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, query):
+        return self.client.get(
+            reverse("dogs:search"), {"q": query}, secure=True, HTTP_HX_REQUEST="true"
+        )
+
+    def test_search_dogs_breeds_and_owners(self):
+        self.assertContains(self.search("рекс"), "Рекс")
+        self.assertContains(self.search("иван"), "Рекс")
+        response = self.search("бульд")
+        self.assertContains(response, "Бульдог")
+        self.assertNotContains(response, "<html")
+
+    def test_results_cached(self):
+        self.search("шар")
+        with self.assertNumQueries(0):
+            self.assertContains(self.search("Шар"), "Шарик")
+
+
+class FacetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bulldog = Breed.objects.create(name="Бульдог")
+        cls.pug = Breed.objects.create(name="Мопс")
+        cls.owner = User.objects.create(email="owner@test.ru")
+        today = date.today()
+        for days in (10, 200, 360, 370, 800, 2000, 4000):
+            Dog.objects.create(
+                name=f"Dog{days}",
+                breed=cls.bulldog,
+                birth_date=today - timedelta(days=days),
+                owner=cls.owner if days < 1000 else None,
+            )
+        Dog.objects.create(name="Рекс", breed=cls.pug, photo="dogs/rex.jpg")
+
+    def assertCountsMatchRebuild(self):
+        counts = {
+            facet: {value: n for value, n in values.items() if n}
+            for facet, values in load_counts().items()
+        }
+        rebuild()
+        self.assertEqual(counts, load_counts())
+
+    def test_signals_keep_counts(self):
+        self.assertCountsMatchRebuild()
+        dog = Dog.objects.for_list().get(name="Рекс")
+        dog.name = "Рекс II"
+        dog.save()
+        dog = Dog.objects.get(name="Рекс II")
+        dog.breed = self.bulldog
+        dog.photo = ""
+        dog.save()
+        Dog.objects.get(name="Dog10").delete()
+        self.owner.delete()
+        self.assertCountsMatchRebuild()
+
+    def test_loading_dogs_takes_no_snapshot(self):
+        # Прежние значения читаются в pre_save, загрузка собак их не считает.
+        self.assertFalse(post_init.has_listeners(Dog))
+        dog = Dog.objects.get(name="Рекс")
+        dog.birth_date = date.today()
+        dog.save()
+        self.assertCountsMatchRebuild()
+
+    def test_sidebar_counts_match_filters(self):
+        today = date.today()
+        params = QueryDict()
+        groups = sidebar(load_counts(), {self.bulldog.pk: "Бульдог"}, params, today)
+        self.assertEqual(
+            [group["title"] for group in groups],
+            ["Порода", "Возраст", "Фото", "Хозяин"],
+        )
+        for group in groups:
+            for option in group["options"]:
+                filtered = filter_dogs(
+                    Dog.objects.all(), QueryDict(option["url"][1:]), today
+                )
+                self.assertEqual(filtered.count(), option["count"], option)
+
+    def test_list_filter(self):
+        cache.clear()
+        response = self.client.get(
+            reverse("dogs:dogs_list"), {"photo": "yes"}, secure=True
+        )
+        self.assertEqual(
+            [dog.name for dog in response.context["object_list"]], ["Рекс"]
+        )
+        self.assertContains(response, "dog-facets__link--active")
+
+
+class BreedStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bulldog = Breed.objects.create(name="Бульдог")
+        cls.pug = Breed.objects.create(name="Мопс")
+        for days in (100, 400, 1000):
+            Dog.objects.create(
+                name=f"Dog{days}",
+                breed=cls.bulldog,
+                birth_date=date.today() - timedelta(days=days),
+            )
+        Dog.objects.create(name="Рекс", breed=cls.pug)
+
+    def stats(self):
+        return {
+            row.breed_id: (
+                row.dog_count,
+                row.dated_count,
+                row.birth_ordinal_sum,
+                row.latest_dog_id,
+            )
+            for row in BreedStats.objects.all()
+        }
+
+    def assertStatsMatchRebuild(self):
+        stats = self.stats()
+        breed_stats.rebuild()
+        self.assertEqual(stats, self.stats())
+
+    def test_signals_keep_stats(self):
+        self.assertStatsMatchRebuild()
+        dog = Dog.objects.only("name").get(name="Dog100")
+        dog.breed = self.pug
+        dog.save()
+        Dog.objects.create(name="Бим", breed=self.pug, birth_date=date(2020, 1, 1))
+        Dog.objects.get(name="Dog400").delete()
+        Dog.objects.get(name="Бим").delete()
+        self.assertStatsMatchRebuild()
+        self.assertEqual(self.stats()[self.bulldog.pk][0], 1)
+
+    def test_breeds_page_without_count_per_card(self):
+        for i in range(5):
+            Breed.objects.create(name=f"Порода{i}")
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("dogs:breeds"), secure=True)
+        self.assertContains(response, "Собак: 3")
+        self.assertContains(response, "Dog1000")
+
+
+class ImportDogsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.breed = Breed.objects.create(name="Бульдог")
+        cls.owner = User.objects.create(email="owner@test.ru")
+
+    def run_import(self, content, suffix, *args):
+        file = tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, encoding="utf-8", delete=False
+        )
+        self.addCleanup(os.remove, file.name)
+        with file:
+            file.write(content)
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_dogs", file.name, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_import_links_parents_and_owner(self):
+        content = (
+            "name,breed,birth_date,owner,photo,parent1_name,parent1_breed,"
+            "parent1_birth_date,parent2_name,parent2_breed,parent2_birth_date\n"
+            "Рекс,бульдог,2020-01-31,OWNER@test.ru,,Макс,Бульдог,,Белла,Бульдог,\n"
+        )
+        self.run_import(content, ".csv")
+        dog = Dog.objects.get(name="Рекс")
+        self.assertEqual(dog.owner, self.owner)
+        self.assertEqual(dog.birth_date, date(2020, 1, 31))
+        self.assertEqual(
+            sorted(dog.dogparent_set.values_list("name", flat=True)),
+            ["Белла", "Макс"],
+        )
+        self.assertEqual(BreedStats.objects.get(breed=self.breed).dog_count, 1)
+
+    def test_jsonl_validation_errors_skip_rows(self):
+        records = [
+            {"name": "Рекс", "breed": "Бульдог"},
+            {"name": "Р", "breed": "Бульдог"},
+            {"name": "Бим", "breed": "Такса"},
+            {"name": "Джек", "breed": "Бульдог", "parents": [{"name": "М" * 31}]},
+        ]
+        content = "".join(json.dumps(record) + "\n" for record in records)
+        stdout, stderr = self.run_import(content, ".jsonl")
+        self.assertEqual(list(Dog.objects.values_list("name", flat=True)), ["Рекс"])
+        self.assertIn("Импортировано: 1, пропущено: 3", stdout)
+        self.assertIn("Строка 2: Имя должно", stderr)
+        self.assertIn("Строка 3: Порода «Такса» не найдена.", stderr)
+        self.assertIn("Строка 4: Имя родителя должно", stderr)
+
+    def test_malformed_jsonl_lines_skip_rows(self):
+        content = "\n".join(
+            [
+                json.dumps({"name": "Рекс", "breed": "Бульдог"}),
+                '{"name": "Бим", ',
+                "[]",
+                json.dumps({"name": ["Бим"], "breed": "Бульдог"}),
+                json.dumps({"name": "Джек", "breed": "Бульдог", "parents": ["Макс"]}),
+                json.dumps({"name": "Белла", "breed": "Бульдог"}),
+            ]
+        )
+        stdout, stderr = self.run_import(content, ".jsonl", "--batch-size", "1")
+        self.assertEqual(
+            sorted(Dog.objects.values_list("name", flat=True)), ["Белла", "Рекс"]
+        )
+        self.assertIn("Импортировано: 2, пропущено: 4", stdout)
+        self.assertIn("Строка 2: Некорректный JSON", stderr)
+        self.assertIn("Строка 3: Запись должна быть объектом JSON.", stderr)
+        self.assertIn("Строка 4: Запись: поле «name» должно быть строкой.", stderr)
+        self.assertIn("Строка 5: Запись родителя должна быть объектом JSON.", stderr)
+
+    def test_dry_run_writes_nothing(self):
+        content = json.dumps({"name": "Бим", "breed": "Такса"}) + "\n"
+        stdout, _ = self.run_import(content, ".jsonl", "--dry-run", "--create-breeds")
+        self.assertIn("Проверено без записи: 1", stdout)
+        self.assertFalse(Dog.objects.exists())
+        self.assertFalse(Breed.objects.filter(name="Такса").exists())
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(
+            email="admin@test.ru", is_staff=True, is_superuser=True
+        )
+        breed = Breed.objects.create(name="Бульдог")
+        Dog.objects.create(name="Рекс", breed=breed, owner=cls.admin)
+
+    def test_export_dogs_csv(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse("admin:dogs_dog_export", args=["csv"]), secure=True
+        )
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,name,breed,birth_date,owner,photo")
+        self.assertIn("Рекс,Бульдог,,admin@test.ru", lines[1])
+
+    def test_export_users_jsonl_has_no_password(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse("admin:users_user_export", args=["jsonl"]), secure=True
+        )
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn('"email": "admin@test.ru"', content)
+        self.assertNotIn("password", content)
+
+    async def test_export_asgi_is_async(self):
+        response = stream_export(
+            Dog.objects.order_by("pk"), {"name": "name"}, "csv", asynchronous=True
+        )
+        self.assertTrue(response.is_async)
+        lines = [line async for line in response.streaming_content]
+        self.assertEqual(b"".join(lines).decode().splitlines(), ["name", "Рекс"])
@@ -26,6 +26,16 @@ urlpatterns = [
         views.DogListView.as_view(),
         name="dogs_list",
     ),
+    path(
+        "search/",
+        views.search,
+        name="search",
+    ),
+    path(
+        "dogs/mating/",
+        views.trial_mating_view,
+        name="trial_mating",
+    ),
     path(
         "dogs/create/",
         views.DogCreateView.as_view(),
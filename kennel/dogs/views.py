@@ -1,4 +1,7 @@
-from django.shortcuts import render, reverse, get_object_or_404
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import render, reverse, aget_object_or_404
+from django.utils import timezone
 from django.views.generic import (
     ListView,
     CreateView,
@@ -8,17 +11,56 @@ from django.views.generic import (
 )
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.forms import inlineformset_factory
+from django.db import transaction
+from django.utils.functional import cached_property
+
+from .models import Breed, BreedStats, Dog, DogFacetCount, DogParent
+from .forms import DogForm, DogParentFormSet
+from .facets import aload_counts, filter_dogs, sidebar
+from .inbreeding import COI_GENERATIONS, dog_coi, trial_mating
+from .pedigree import GENERATIONS, aancestry_tree, adescendant_tree
+from .search import MIN_QUERY_LENGTH, asearch, normalize_query
+from users.models import User
+from config.core.mixins import (
+    HtmxRedirectMixin,
+    IsOwnerOrAdminRequiredMixin,
+    KeysetPaginationMixin,
+    OwnerQuerysetMixin,
+    PinPrimaryAfterWriteMixin,
+    aload_user,
+)
+from config.core.cache import acached, amake_key
+from config.core.invalidation import scope
+from config.core.pagination import aget_keyset_page, is_htmx_fragment
+
+DOGS_PER_PAGE = 24
+# Карточки пород показывают статистику: её изменения тоже сбрасывают кэш.
+BREED_CARD_SCOPES = [scope(Breed), scope(BreedStats)]
+
+
+async def get_cached_breeds(name, queryset):
+    """Список пород из кэша; в async-представлении queryset нельзя отдавать в шаблон."""
+    return await acached(
+        "breeds",
+        [name],
+        lambda: alist(queryset),
+        scopes=BREED_CARD_SCOPES,
+    )
 
-from .models import Breed, Dog, DogParent
-from .forms import DogForm, DogParentForm
-from config.core.mixins import HtmxRedirectMixin, IsOwnerOrAdminRequiredMixin
 
+async def alist(queryset):
+    return [obj async for obj in queryset]
 
-def index(request):
+
+async def index(request):
     """Отображает главную страницу с перечнем первых 3-х пород."""
+    await aload_user(request)
     context = {
-        "breeds": Breed.objects.all()[:3],
+        "breeds": await get_cached_breeds("index", Breed.objects.for_cards()[:3]),
+        "breeds_cache_key": await amake_key(
+            "breed_cards", "index", scopes=BREED_CARD_SCOPES
+        ),
+        "cache_timeout": settings.PUBLIC_CACHE_TIMEOUT,
         "title": "Питомник - Главная",
     }
     return render(
@@ -28,10 +70,15 @@ def index(request):
     )
 
 
-def breeds_list(request):
+async def breeds_list(request):
     """Отображает список всех пород собак."""
+    await aload_user(request)
     context = {
-        "breeds": Breed.objects.all(),
+        "breeds": await get_cached_breeds("list", Breed.objects.for_cards()),
+        "breeds_cache_key": await amake_key(
+            "breed_cards", "list", scopes=BREED_CARD_SCOPES
+        ),
+        "cache_timeout": settings.PUBLIC_CACHE_TIMEOUT,
         "title": "Питомник - Все наши породы",
     }
     return render(
@@ -41,30 +88,139 @@ def breeds_list(request):
     )
 
 
-def dogs_by_breed(request, pk: int):
+async def get_cached_dogs_page(request, queryset, dogs_scope):
+    """
+    Страница списка собак из кэша.
+    Ключ учитывает курсор и фильтры запроса и версию области собак.
+    """
+    return await acached(
+        "dogs_page",
+        [dogs_scope, request.GET.urlencode()],
+        lambda: aget_keyset_page(request, queryset, DOGS_PER_PAGE),
+        scopes=[dogs_scope],
+    )
+
+
+async def dogs_by_breed(request, pk: int):
     """Отображает список собак для конкретной породы."""
-    breed = get_object_or_404(Breed, pk=pk)
+    await aload_user(request)
+    breed = await acached(
+        "breed",
+        [pk],
+        lambda: aget_object_or_404(Breed, pk=pk),
+        scopes=[scope(Breed, pk=pk)],
+    )
+    page = await get_cached_dogs_page(
+        request, Dog.objects.for_list().filter(breed_id=pk), scope(Dog, breed=pk)
+    )
     context = {
-        "dogs": Dog.objects.filter(breed_id=pk),
+        "object_list": page.object_list,
+        "page": page,
         "title": f"Собаки породы - {breed.name}",
         "breed_pk": breed.pk,
     }
+    template_name = "dogs/dog/list.html"
+    if is_htmx_fragment(request):
+        template_name = "dogs/dog_includes/dog-list-items.html"
     return render(
         request,
-        "dogs/dog/list.html",
+        template_name,
         context,
     )
 
 
-class DogListView(ListView):
+async def search(request):
+    """Поиск по мере ввода: HTMX подменяет только блок результатов."""
+    await aload_user(request)
+    query = normalize_query(request.GET.get("q", ""))
+    results = None
+    if len(query) >= MIN_QUERY_LENGTH:
+        results = await acached(
+            "search",
+            [query],
+            lambda: asearch(query),
+            scopes=[scope(Dog), scope(Breed), scope(User)],
+        )
+    context = {
+        "query": query,
+        "results": results,
+        "min_length": MIN_QUERY_LENGTH,
+        "title": "Питомник - Поиск",
+    }
+    template_name = "dogs/search/search.html"
+    if request.headers.get("HX-Request"):
+        template_name = "dogs/search/results.html"
+    return render(request, template_name, context)
+
+
+def trial_mating_view(request):
+    """
+    Пробная вязка: COI щенков пары ?sire=<id>&dam=<id>, COI родителей
+    и общие предки (JSON).
+    """
+    try:
+        sire_id, dam_id = int(request.GET["sire"]), int(request.GET["dam"])
+    except (KeyError, ValueError):
+        return JsonResponse({"error": "Укажите id собак: sire и dam."}, status=400)
+    if sire_id == dam_id:
+        return JsonResponse({"error": "Нужны две разные собаки."}, status=400)
+    try:
+        result = trial_mating(sire_id, dam_id)
+    except Dog.DoesNotExist:
+        return JsonResponse({"error": "Собака не найдена."}, status=404)
+    return JsonResponse(
+        {
+            "sire": sire_id,
+            "dam": dam_id,
+            "generations": COI_GENERATIONS,
+            "coi": result["coi"],
+            "sire_coi": dog_coi(sire_id),
+            "dam_coi": dog_coi(dam_id),
+            "common_ancestors": result["common_ancestors"],
+        }
+    )
+
+
+class DogListView(KeysetPaginationMixin, ListView):
     model = Dog
     template_name = "dogs/dog/list.html"
+    fragment_template_name = "dogs/dog_includes/dog-list-items.html"
+    keyset_paginate_by = DOGS_PER_PAGE
     extra_context = {
         "title": "Питомник - Все наши собаки",
     }
 
+    def get_queryset(self):
+        return filter_dogs(
+            Dog.objects.for_list(), self.request.GET, timezone.localdate()
+        )
 
-class DogCreateView(LoginRequiredMixin, CreateView):
+    async def get(self, request, *args, **kwargs):
+        await aload_user(request)
+        self.object_list = self.get_queryset()
+        page = await get_cached_dogs_page(request, self.object_list, scope(Dog))
+        context = self.get_context_data(page=page)
+        if not is_htmx_fragment(request, self.cursor_kwarg):
+            context["facets"] = await self.aget_facets()
+        return self.render_to_response(context)
+
+    async def aget_facets(self):
+        """Боковая панель фильтров по счётчикам из DogFacetCount."""
+        counts = await acached(
+            "dog_facet_counts", [], aload_counts, scopes=[scope(DogFacetCount)]
+        )
+        breed_names = await acached(
+            "breed_names",
+            [],
+            lambda: alist(Breed.objects.values_list("id", "name")),
+            scopes=[scope(Breed)],
+        )
+        return sidebar(
+            counts, dict(breed_names), self.request.GET, timezone.localdate()
+        )
+
+
+class DogCreateView(LoginRequiredMixin, PinPrimaryAfterWriteMixin, CreateView):
     model = Dog
     form_class = DogForm
     template_name = "dogs/dog/create.html"
@@ -86,6 +242,36 @@ class DogDetailView(DetailView):
     model = Dog
     template_name = "dogs/dog/detail.html"
 
+    def get_queryset(self):
+        return Dog.objects.for_detail()
+
+    async def get(self, request, *args, **kwargs):
+        await aload_user(request)
+        pk = self.kwargs["pk"]
+        self.object = await acached(
+            "dog_detail",
+            [pk],
+            lambda: aget_object_or_404(self.get_queryset(), pk=pk),
+            scopes=[scope(Dog, pk=pk), scope(Breed)],
+        )
+        pedigree = await acached(
+            "pedigree",
+            [pk, GENERATIONS],
+            lambda: self.aget_pedigree(pk),
+            scopes=[scope(Dog), scope(DogParent)],
+        )
+        return self.render_to_response(
+            self.get_context_data(object=self.object, pedigree=pedigree)
+        )
+
+    @staticmethod
+    async def aget_pedigree(pk):
+        """Предки и потомки: по одному рекурсивному запросу."""
+        return {
+            "ancestors": await aancestry_tree(pk),
+            "descendants": await adescendant_tree(pk),
+        }
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         dog = self.object
@@ -93,7 +279,12 @@ class DogDetailView(DetailView):
         return context
 
 
-class DogUpdateView(LoginRequiredMixin, IsOwnerOrAdminRequiredMixin, UpdateView):
+class DogUpdateView(
+    LoginRequiredMixin,
+    IsOwnerOrAdminRequiredMixin,
+    PinPrimaryAfterWriteMixin,
+    UpdateView,
+):
     model = Dog
     form_class = DogForm
     template_name = "dogs/dog/update.html"
@@ -102,35 +293,41 @@ class DogUpdateView(LoginRequiredMixin, IsOwnerOrAdminRequiredMixin, UpdateView)
     }
 
     def get_success_url(self):
-        return reverse("dogs:dog_detail", kwargs={"pk": self.get_object().pk})
+        return reverse("dogs:dog_detail", kwargs={"pk": self.object.pk})
+
+    @cached_property
+    def formset(self):
+        """Родители собаки; создаётся один раз на запрос (после self.object)."""
+        data = self.request.POST if self.request.method == "POST" else None
+        return DogParentFormSet(data, instance=self.object)
 
     def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        DogParentFormset = inlineformset_factory(
-            Dog,
-            DogParent,
-            form=DogParentForm,
-            extra=1,
-        )
-        if self.request.method == "POST":
-            formset = DogParentFormset(self.request.POST, instance=self.object)
-        else:
-            formset = DogParentFormset(instance=self.object)
-        context["formset"] = formset
-        return context
+        kwargs.setdefault("formset", self.formset)
+        return super().get_context_data(**kwargs)
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        form = self.get_form()
+        # Проверяются обе формы, чтобы показать все ошибки сразу.
+        formset_valid = self.formset.is_valid()
+        if form.is_valid() and formset_valid:
+            return self.form_valid(form)
+        return self.form_invalid(form)
 
     def form_valid(self, form):
-        context = self.get_context_data()
-        formset = context["formset"]
-        self.object = form.save()
-        if formset.is_valid():
-            formset.instance = self.object
-            formset.save()
-        return super().form_valid(form)
+        with transaction.atomic():
+            response = super().form_valid(form)
+            self.formset.instance = self.object
+            self.formset.save()
+        return response
 
 
 class DogDeleteView(
-    LoginRequiredMixin, IsOwnerOrAdminRequiredMixin, HtmxRedirectMixin, DeleteView
+    LoginRequiredMixin,
+    IsOwnerOrAdminRequiredMixin,
+    PinPrimaryAfterWriteMixin,
+    HtmxRedirectMixin,
+    DeleteView,
 ):
     model = Dog
     template_name = "dogs/dog/detail.html"
@@ -145,6 +342,6 @@ class DogDeleteConfirmView(LoginRequiredMixin, IsOwnerOrAdminRequiredMixin, Deta
     template_name = "dogs/dog_includes/confirm-delete-buttons.html"
 
 
-class DogDeleteAbort(LoginRequiredMixin, DetailView):
+class DogDeleteAbort(LoginRequiredMixin, OwnerQuerysetMixin, DetailView):
     model = Dog
     template_name = "dogs/dog_includes/dog-detail-buttons.html"
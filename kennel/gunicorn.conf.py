@@ -0,0 +1,36 @@
+"""
+Настройки gunicorn.
+SERVER_MODE=asgi (по умолчанию) — воркеры uvicorn для async-представлений,
+wsgi — синхронные воркеры (каждое async-представление идёт через async_to_sync).
+LocMemCache у каждого процесса свой: сброс кэша, версии инвалидации
+и счётчики лимитов не видны соседним воркерам. Без общего кэша
+(CACHE_BACKEND — Redis/Memcached) запускается один воркер.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+shared_cache = os.getenv("CACHE_BACKEND") not in {None, "", *LOCAL_CACHES}
+workers = int(
+    os.getenv(
+        "GUNICORN_WORKERS",
+        multiprocessing.cpu_count() * 2 + 1 if shared_cache else 1,
+    )
+)
+if workers > 1 and not shared_cache:
+    raise RuntimeError(
+        f"GUNICORN_WORKERS={workers} с локальным кэшем процесса: "
+        "задайте общий CACHE_BACKEND (Redis/Memcached) или один воркер."
+    )
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+
+if os.getenv("SERVER_MODE", "asgi").lower() == "asgi":
+    wsgi_app = "config.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "config.wsgi:application"
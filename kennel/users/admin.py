@@ -1,11 +1,12 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
+from config.core.export import ExportAdminMixin
 from .models import User
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(ExportAdminMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "last_name",
@@ -44,6 +45,20 @@ class UserAdmin(admin.ModelAdmin):
         "last_login",
     )
     ordering = ("id",)
+    # Без пароля: выгрузка не должна содержать хэши.
+    export_fields = {
+        "id": "id",
+        "email": "email",
+        "first_name": "first_name",
+        "last_name": "last_name",
+        "phone": "phone",
+        "telegram": "telegram",
+        "birth_date": "birth_date",
+        "gender": "gender",
+        "is_active": "is_active",
+        "date_joined": "date_joined",
+        "last_login": "last_login",
+    }
 
     fieldsets = (
         (
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        from django.contrib.auth.signals import user_logged_in
+
+        from config.core.mail import get_mail_template
+        from .backends import update_last_login
+        from .services import MAIL_TEMPLATES
+
+        user_logged_in.disconnect(dispatch_uid="update_last_login")
+        user_logged_in.connect(update_last_login, dispatch_uid="update_last_login")
+
+        # Компилируем шаблоны писем при старте, а не на первой отправке.
+        for template_name in MAIL_TEMPLATES:
+            get_mail_template(template_name)
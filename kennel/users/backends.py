@@ -0,0 +1,109 @@
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.exceptions import PermissionDenied
+from django.utils import timezone
+
+from config.core.cache import cached
+from config.core.invalidation import scope
+from .models import User
+
+logger = logging.getLogger("users")
+
+# Поля, нужные для входа: проверка пароля, is_active, хэш сессии, last_login.
+LOGIN_FIELDS = ("id", "email", "password", "is_active", "last_login")
+
+
+def auth_user_scope(user_id) -> str:
+    """Область кэша пользователя сессии; сбрасывается при любом его сохранении."""
+    return scope(User, auth=user_id)
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend с кэшем пользователя сессии (settings.AUTH_USER_CACHE):
+    авторизованный запрос не читает пользователя из БД.
+    Кэш должен быть общим для процессов (Redis/Memcached): после смены
+    пароля хэш сессии сверяется с паролем из кэша.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """
+        Вход по email: один запрос по индексу LOWER(email), только LOGIN_FIELDS.
+        Для неизвестного email пароль всё равно хэшируется: время ответа
+        не выдаёт, есть ли адрес в базе. Неудача останавливает перебор
+        бэкендов (PermissionDenied). Перехэшированный пароль
+        сохраняется вместе с last_login (update_last_login).
+        Время этапов в мс — request.auth_timings и лог users (DEBUG).
+
+        Ограничение: время одинаково только для хэшей текущего профиля.
+        Проверка старого хэша (другой алгоритм или параметры) идёт со своей
+        скоростью, а его перехэширование — второй хэш в том же запросе
+        (выносить его в фоновую задачу нельзя: задаче пришлось бы передать
+        пароль). После смены профиля время входа с известным email
+        отличается, пока пароли не перехэшированы.
+        """
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        started = time.perf_counter()
+        user = (
+            User.objects.only(*LOGIN_FIELDS)
+            .filter(email__lower=username.strip().lower())
+            .first()
+        )
+        lookup_done = time.perf_counter()
+        if user is None:
+            make_password(password)
+            valid = False
+        else:
+            valid = check_password(
+                password, user.password, setter=lambda raw: self.rehash(user, raw)
+            )
+        timings = {
+            "lookup": (lookup_done - started) * 1000,
+            "hash": (time.perf_counter() - lookup_done) * 1000,
+        }
+        if request is not None:
+            request.auth_timings = timings
+        logger.debug(
+            "Вход: поиск %.1f мс, хэш %.1f мс", timings["lookup"], timings["hash"]
+        )
+        if valid and self.user_can_authenticate(user):
+            return user
+        # Без второй проверки того же пароля в ModelBackend из списка.
+        raise PermissionDenied
+
+    @staticmethod
+    def rehash(user, raw_password):
+        """Хэш по текущему алгоритму; сохраняется при обновлении last_login."""
+        user.set_password(raw_password)
+        user._password = None
+        user.password_rehashed = True
+
+    def get_user(self, user_id):
+        if not settings.AUTH_USER_CACHE:
+            return super().get_user(user_id)
+        return cached(
+            "auth_user",
+            [user_id],
+            lambda: super(CachedModelBackend, self).get_user(user_id),
+            scopes=[auth_user_scope(user_id)],
+        )
+
+
+def update_last_login(sender, user, **kwargs):
+    """
+    Замена django.contrib.auth.models.update_last_login: last_login
+    и перехэшированный при входе пароль — одним UPDATE.
+    """
+    user.last_login = timezone.now()
+    update_fields = ["last_login"]
+    if getattr(user, "password_rehashed", False):
+        update_fields.append("password")
+        user.password_rehashed = False
+    user.save(update_fields=update_fields)
@@ -1,5 +1,7 @@
 from django import forms
+from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.contrib.auth.forms import (
     PasswordChangeForm,
     UserCreationForm,
@@ -44,7 +46,7 @@ class UserRegisterForm(UserCreationForm):
     def clean_email(self):
         """Валидация email для регистрации."""
         email = self.cleaned_data.get("email").strip().lower()
-        if User.objects.filter(email=email).exists():
+        if User.objects.filter(email__lower=email).exists():
             raise ValidationError(f'Увы, адрес "{email}" уже занят. Попробуйте другой.')
         return email
 
@@ -63,7 +65,8 @@ class UserLoginForm(forms.Form):
     )
 
     def __init__(self, *args, **kwargs):
-        kwargs.pop("request", None)
+        self.request = kwargs.pop("request", None)
+        self.user_cache = None
         super().__init__(*args, **kwargs)
 
     def clean_password(self):
@@ -73,25 +76,18 @@ class UserLoginForm(forms.Form):
 
     def clean(self):
         """
-        Проверка существует ли пользователь в базе.
-        Проверка блокировки доступа к аккаунту.
+        Аутентификация через users.backends.CachedModelBackend.
+        Неизвестный email, неверный пароль и заблокированный аккаунт
+        дают одну ошибку: ответ не выдаёт, есть ли адрес в базе.
         """
-        email = self.cleaned_data.get("email").strip().lower()
+        email = self.cleaned_data.get("email")
         password = self.cleaned_data.get("password")
         if email and password:
-            try:
-                user = User.objects.get(email=email)
-            except User.DoesNotExist:
-                self.add_error("email", ValidationError("Неверный email."))
-                return self.cleaned_data
-            if not user.check_password(password):
-                self.add_error("password", ValidationError("Неверный пароль."))
-                return self.cleaned_data
-            if not user.is_active:
-                raise ValidationError(
-                    "Доступ заблокирован, обратитесь к администрации сайта."
-                )
-            self.user_cache = user
+            self.user_cache = authenticate(
+                self.request, email=email.strip(), password=password
+            )
+            if self.user_cache is None:
+                raise ValidationError("Неверный email или пароль.")
         return self.cleaned_data
 
     def get_user(self):
@@ -143,7 +139,7 @@ class UserUpdateForm(forms.ModelForm):
         """Валидация email для обновления."""
         email = self.cleaned_data.get("email").strip().lower()
         user_email = self.instance.email.strip().lower()
-        if email != user_email and User.objects.filter(email=email).exists():
+        if email != user_email and User.objects.filter(email__lower=email).exists():
             raise ValidationError(f"{email} уже зарегистрирован.")
         return email
 
@@ -154,9 +150,18 @@ class UserUpdateForm(forms.ModelForm):
             return
         PhotoValidator.photo_size(new_photo)
         PhotoValidator.photo_extension(new_photo)
-        PhotoValidator.delete_old_photo(self.instance, "profile_picture", new_photo)
         return new_photo
 
+    def save(self, commit=True):
+        """Сохраняет профиль; заменённое фото удаляется после коммита."""
+        with transaction.atomic():
+            user = super().save(commit)
+            if commit:
+                PhotoValidator.delete_old_photo(
+                    self.initial.get("profile_picture"), user.profile_picture
+                )
+        return user
+
 
 class UserPasswordChangeForm(PasswordChangeForm):
     """Форма для смены пароля."""
@@ -194,6 +199,6 @@ class UserEmailExistsForm(forms.Form):
     def clean_email(self):
         """Валидация email, проверка на наличие в базе."""
         email = self.cleaned_data.get("email").strip().lower()
-        if not User.objects.filter(email=email).exists():
+        if not User.objects.filter(email__lower=email).exists():
             raise forms.ValidationError(f"Пользователь {email} не найден.")
         return email
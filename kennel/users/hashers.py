@@ -0,0 +1,58 @@
+"""
+Хэшеры паролей с параметрами из settings.PASSWORD_HASHER_PARAMS.
+
+Алгоритм (префикс хэша) совпадает со стандартным хэшером Django, поэтому
+старые хэши проверяются, а при входе с другими параметрами или алгоритмом
+пароль перехэшируется по текущему профилю (CachedModelBackend.rehash).
+Подбор параметров: manage.py bench_hashers.
+"""
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+class ProfileHasherMixin:
+    profile = None
+
+    def __init__(self, **params):
+        params = {**settings.PASSWORD_HASHER_PARAMS[self.profile], **params}
+        for name, value in params.items():
+            setattr(self, name, value)
+
+    @property
+    def params(self) -> dict:
+        return {name: getattr(self, name) for name in self.tuned}
+
+
+class PBKDF2ProfileHasher(ProfileHasherMixin, PBKDF2PasswordHasher):
+    profile = "pbkdf2"
+    tuned = ("iterations",)
+
+
+class Argon2ProfileHasher(ProfileHasherMixin, Argon2PasswordHasher):
+    """Нужен пакет argon2-cffi; memory_cost в КиБ."""
+
+    profile = "argon2"
+    tuned = ("time_cost", "memory_cost", "parallelism")
+
+
+class ScryptProfileHasher(ProfileHasherMixin, ScryptPasswordHasher):
+    """Память на хэш: 128 * block_size * work_factor байт."""
+
+    profile = "scrypt"
+    tuned = ("work_factor", "block_size", "parallelism")
+
+    @property
+    def maxmem(self):
+        # По умолчанию OpenSSL разрешает 32 МиБ: мало для work_factor от 2**15.
+        return max(64 * 1024 * 1024, 256 * self.block_size * self.work_factor)
+
+
+PROFILE_HASHERS = {
+    hasher.profile: hasher
+    for hasher in (PBKDF2ProfileHasher, Argon2ProfileHasher, ScryptProfileHasher)
+}
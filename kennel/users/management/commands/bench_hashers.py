@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management import BaseCommand
+
+from users.hashers import PROFILE_HASHERS
+
+
+class Command(BaseCommand):
+    help = (
+        "Скорость хэширования паролей для профилей PASSWORD_HASHER_PARAMS: "
+        "мс на хэш и хэшей в секунду на одно ядро (проверка пароля при входе "
+        "стоит столько же, сколько хэширование)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            nargs="+",
+            choices=list(PROFILE_HASHERS),
+            help="Профили для замера. По умолчанию все.",
+        )
+        parser.add_argument("--seconds", type=float, default=3.0)
+
+    def measure(self, hasher, seconds):
+        salt = hasher.salt()
+        hasher.encode("warm-up-password", salt)
+        count = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            hasher.encode(f"password-{count}", salt)
+            count += 1
+        return count / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        cores = os.cpu_count() or 1
+        self.stdout.write(f"Ядер: {cores}")
+        for name in options["profile"] or PROFILE_HASHERS:
+            hasher = PROFILE_HASHERS[name]()
+            params = ", ".join(f"{k}={v}" for k, v in hasher.params.items())
+            try:
+                rate = self.measure(hasher, options["seconds"])
+            except ValueError as error:
+                # Не установлена библиотека алгоритма (argon2-cffi).
+                self.stdout.write(self.style.WARNING(f"{name}: {error}"))
+                continue
+            self.stdout.write(
+                f"{name:<7} {params}: {1000 / rate:7.1f} мс на хэш, "
+                f"{rate:7.1f} хэшей/с на ядро, ~{rate * cores:.0f} хэшей/с всего"
+            )
@@ -0,0 +1,65 @@
+import secrets
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import authenticate
+from django.core.management import BaseCommand
+from django.db import close_old_connections
+from django.http import HttpRequest
+
+from users.models import User
+
+
+def percentile(timings, share):
+    return timings[max(int(len(timings) * share) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Время входа по этапам (поиск пользователя, хэш пароля) для известного "
+        "и неизвестного email под параллельной нагрузкой. Создаёт временного "
+        "пользователя и удаляет его после замера."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=4)
+
+    def login(self, email, password):
+        request = HttpRequest()
+        try:
+            authenticate(request, email=email, password=password)
+            return request.auth_timings
+        finally:
+            close_old_connections()
+
+    def report(self, label, results):
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        for stage in ("lookup", "hash"):
+            timings = sorted(result[stage] for result in results)
+            self.stdout.write(
+                f"  {stage:<7} медиана {statistics.median(timings):7.2f} мс, "
+                f"p95 {percentile(timings, 0.95):7.2f} мс, "
+                f"p99 {percentile(timings, 0.99):7.2f} мс"
+            )
+
+    def handle(self, *args, **options):
+        password = secrets.token_urlsafe(12)
+        user = User(email=f"bench-{secrets.token_hex(4)}@example.com")
+        user.set_password(password)
+        user.save()
+        cases = {
+            "Известный email": (user.email, password),
+            "Неизвестный email": (f"missing-{user.email}", password),
+        }
+        try:
+            with ThreadPoolExecutor(options["concurrency"]) as pool:
+                for label, (email, raw) in cases.items():
+                    results = list(
+                        pool.map(
+                            lambda _: self.login(email, raw), range(options["logins"])
+                        )
+                    )
+                    self.report(label, results)
+        finally:
+            user.delete()
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 
 NULLABLE = {"null": True, "blank": True}
 NULLABLE_FOR_STRING = {"null": False, "blank": True}
@@ -87,30 +88,12 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(Lower("email"), name="users_user_email_lower_idx"),
+        ]
 
-class Meta:
-    verbose_name = "Пользователь"
-    verbose_name_plural = "Пользователи"
-    ordering = ["id"]
 
-
-def __str__(self):
-    return self.email
-
-
-def get_full_name(self):
-    return f"{self.first_name} {self.last_name}"
-
-
-def get_short_name(self):
-    return self.first_name
-
-
-def activate(self):
-    self.is_active = True
-    self.save()
-
-
-def deactivate(self):
-    self.is_active = False
-    self.save()
+# email__lower=... — запрос по функциональному индексу users_user_email_lower_idx.
+# Только для поля User.email, не для всех EmailField проекта.
+User._meta.get_field("email").register_lookup(Lower)
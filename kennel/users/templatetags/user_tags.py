@@ -1,5 +1,7 @@
 from django import template
 
+from config.core.images import srcset
+
 register = template.Library()
 
 
@@ -10,6 +12,12 @@ def user_media(val):
     return "/static/images/default/default-user.jpg"
 
 
+@register.filter
+def user_srcset(val, ext="webp"):
+    """srcset миниатюр фото профиля (webp или jpg)."""
+    return srcset(val, ext)
+
+
 @register.filter
 def shorten_filename(value, length=10):
     """Обрезает название файла до определенной длины, оставляя начало и расширение."""
@@ -1,3 +1,299 @@
-from django.test import TestCase
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.http import HttpRequest
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from config.core.mail import MailQueue, build_mail
+from .hashers import PBKDF2ProfileHasher
+from .models import User
+from .services import NEW_PASSWORD_TEMPLATE
+
+
+class FlakyEmailBackend(EmailBackend):
+    """
+    Первая отправка падает, как при обрыве SMTP;
+    письма на bad@test.ru сервер отклоняет кодом 550.
+    """
+
+    failures = 1
+
+    def send_messages(self, messages):
+        if FlakyEmailBackend.failures:
+            FlakyEmailBackend.failures -= 1
+            raise ConnectionError("SMTP недоступен")
+        for message in messages:
+            if "bad@test.ru" in message.to:
+                raise SMTPRecipientsRefused({"bad@test.ru": (550, b"No such user")})
+        return super().send_messages(messages)
+
+
+@override_settings(
+    MAIL_QUEUE_ASYNC=True,
+    MAIL_RETRY_DELAY=0,
+    EMAIL_BACKEND="users.tests.FlakyEmailBackend",
+)
+class MailQueueTest(SimpleTestCase):
+    def setUp(self):
+        FlakyEmailBackend.failures = 0
+
+    def make_messages(self, *emails):
+        return [EmailMessage("Тема", "Текст", to=[email]) for email in emails]
+
+    def test_batch_uses_one_connection(self):
+        with mock.patch(
+            "config.core.mail.get_connection", wraps=get_connection
+        ) as connection:
+            pending = MailQueue.send_batch(
+                self.make_messages("a@test.ru", "b@test.ru", "c@test.ru")
+            )
+        self.assertEqual(pending, [])
+        self.assertEqual(len(mail.outbox), 3)
+        connection.assert_called_once()
+
+    def test_rejected_message_keeps_others(self):
+        messages = self.make_messages("a@test.ru", "bad@test.ru", "c@test.ru")
+        with self.assertLogs("config.core.mail", "ERROR"):
+            self.assertEqual(MailQueue.send_batch(messages), [])
+        self.assertEqual(
+            [message.to for message in mail.outbox], [["a@test.ru"], ["c@test.ru"]]
+        )
+
+    def test_retry_after_failure(self):
+        FlakyEmailBackend.failures = 1
+        queue = MailQueue()
+        with self.assertLogs("config.core.mail", "WARNING"):
+            for message in self.make_messages("a@test.ru", "b@test.ru"):
+                queue.put(message)
+            queue.flush()
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class MailTemplateTest(SimpleTestCase):
+    def test_new_password_mail(self):
+        email = build_mail(
+            NEW_PASSWORD_TEMPLATE, {"new_password": "Abc<123>"}, "Тема", ["a@test.ru"]
+        )
+        html, _ = email.alternatives[0]
+        self.assertIn("Abc&lt;123&gt;", html)
+        self.assertIn("Abc<123>", email.body)
+        self.assertIn("www.cod-ex.ru (https://cod-ex.ru)", email.body)
+        self.assertNotIn("<p", email.body)
+
+
+@override_settings(
+    SESSION_ENGINE="django.contrib.sessions.backends.cached_db",
+    AUTH_USER_CACHE=True,
+)
+class CachedSessionUserTest(TestCase):
+    """Авторизованный запрос без чтения сессии и пользователя из БД."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="user@test.ru", first_name="Иван")
+        self.user.set_password("old-password-1")
+        self.user.save()
+        self.client.force_login(self.user)
+        self.url = reverse("users:profile")
+
+    def get_profile(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, secure=True)
+        return response, [q["sql"] for q in context.captured_queries]
+
+    def test_no_session_or_user_queries(self):
+        self.get_profile()
+        response, queries = self.get_profile()
+        self.assertContains(response, "Иван")
+        self.assertFalse([q for q in queries if "django_session" in q])
+        self.assertFalse([q for q in queries if 'FROM "users_user"' in q])
+
+    def test_user_save_invalidates(self):
+        self.get_profile()
+        self.user.first_name = "Пётр"
+        self.user.save()
+        self.assertContains(self.get_profile()[0], "Пётр")
+        self.user.set_password("new-password-2")
+        self.user.save(update_fields=["password"])
+        self.assertEqual(self.get_profile()[0].status_code, 302)
+
+    def test_model_backend_session_kept(self):
+        self.client.force_login(
+            self.user, backend="django.contrib.auth.backends.ModelBackend"
+        )
+        self.assertContains(self.get_profile()[0], "Иван")
+
+
+@override_settings(
+    PASSWORD_HASHERS=[
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+        "django.contrib.auth.hashers.SHA1PasswordHasher",
+    ]
+)
+class LoginBackendTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="user@test.ru")
+        cls.user.set_password("password-1")
+        cls.user.save()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_single_lookup_with_timings(self):
+        request = HttpRequest()
+        with self.assertNumQueries(1):
+            user = authenticate(request, email="USER@test.ru", password="password-1")
+        self.assertEqual(user, self.user)
+        self.assertEqual(set(request.auth_timings), {"lookup", "hash"})
+
+    def test_unknown_email_hashes_password(self):
+        with mock.patch(
+            "users.backends.make_password"
+        ) as make_password, self.assertNumQueries(1):
+            self.assertIsNone(
+                authenticate(None, email="missing@test.ru", password="password-1")
+            )
+        # Одна проверка: ModelBackend из списка бэкендов не повторяет вход.
+        make_password.assert_called_once_with("password-1")
+
+    def test_rehash_saved_with_last_login(self):
+        with self.settings(
+            PASSWORD_HASHERS=["django.contrib.auth.hashers.SHA1PasswordHasher"]
+        ):
+            self.user.set_password("password-1")
+        User.objects.filter(pk=self.user.pk).update(password=self.user.password)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                reverse("users:login"),
+                {"email": "user@test.ru", "password": "password-1"},
+                secure=True,
+            )
+        self.assertEqual(response.status_code, 302)
+        updates = [
+            q["sql"]
+            for q in context.captured_queries
+            if q["sql"].startswith('UPDATE "users_user"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"password"', updates[0])
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("md5$"))
+
+    def test_wrong_password_generic_error(self):
+        response = self.client.post(
+            reverse("users:login"),
+            {"email": "user@test.ru", "password": "password-2"},
+            secure=True,
+        )
+        self.assertContains(response, "Неверный email или пароль.")
+
+
+@override_settings(
+    RATELIMITS={
+        "login": {"ip": "100/m", "email": "2/m"},
+        "reset_password": {"ip": "1/h", "email": "5/h"},
+    }
+)
+class RateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_login_rejected_before_hashing(self):
+        url = reverse("users:login")
+        data = {"email": "User@test.ru", "password": "password-1"}
+        for _ in range(2):
+            self.client.post(url, data, secure=True)
+        with mock.patch("users.backends.make_password") as make_password:
+            response = self.client.post(
+                url, {**data, "email": "user@test.ru"}, secure=True
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        make_password.assert_not_called()
+        other = self.client.post(url, {**data, "email": "other@test.ru"}, secure=True)
+        self.assertEqual(other.status_code, 200)
+
+    def test_email_limit_does_not_lock_out_other_ips(self):
+        url = reverse("users:login")
+        data = {"email": "user@test.ru", "password": "wrong-password"}
+        for _ in range(3):
+            self.client.post(url, data, secure=True, REMOTE_ADDR="10.0.0.1")
+        response = self.client.post(url, data, secure=True, REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, 200)
+
+    def test_reset_password_email_limit_spans_ips(self):
+        url = reverse("users:reset-password")
+        data = {"email": "User@test.ru"}
+        for i in range(5):
+            self.client.post(url, data, secure=True, REMOTE_ADDR=f"10.0.0.{i}")
+        response = self.client.post(
+            url, {"email": "user@test.ru"}, secure=True, REMOTE_ADDR="10.0.1.1"
+        )
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(RATELIMIT_IP_HEADER="")
+    def test_ip_header_ignored_by_default(self):
+        url = reverse("users:reset-password")
+        self.client.post(url, {"email": "a@test.ru"}, secure=True)
+        response = self.client.post(
+            url, {"email": "b@test.ru"}, secure=True, HTTP_X_REAL_IP="10.0.0.9"
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_reset_password_limited_by_ip(self):
+        url = reverse("users:reset-password")
+        self.client.post(url, {"email": "a@test.ru"}, secure=True)
+        response = self.client.post(
+            url, {"email": "b@test.ru"}, secure=True, headers={"HX-Request": "true"}
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["HX-Retarget"], "#modals-container")
+        self.assertEqual(len(mail.outbox), 0)
+
+
+FAST_HASHER_PARAMS = {
+    "pbkdf2": {"iterations": 1000},
+    "argon2": {"time_cost": 1, "memory_cost": 1024, "parallelism": 1},
+    "scrypt": {"work_factor": 2**10, "block_size": 8, "parallelism": 1},
+}
+
+
+@override_settings(
+    PASSWORD_HASHER_PARAMS=FAST_HASHER_PARAMS,
+    PASSWORD_HASHERS=[
+        "users.hashers.ScryptProfileHasher",
+        "users.hashers.PBKDF2ProfileHasher",
+    ],
+)
+class HasherProfileTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_params_from_settings(self):
+        hasher = PBKDF2ProfileHasher()
+        self.assertEqual(hasher.params, {"iterations": 1000})
+        encoded = PBKDF2ProfileHasher(iterations=500).encode("password-1", "salt")
+        self.assertTrue(hasher.must_update(encoded))
+
+    def test_login_migrates_to_profile(self):
+        user = User.objects.create(email="user@test.ru")
+        user.password = PBKDF2ProfileHasher().encode("password-1", "salt")
+        user.save()
+        response = self.client.post(
+            reverse("users:login"),
+            {"email": "user@test.ru", "password": "password-1"},
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 302)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("scrypt$1024$"))
+        self.assertTrue(user.check_password("password-1"))
@@ -18,7 +18,8 @@ from django.views.generic import (
 )
 from django.urls import reverse_lazy
 
-from config.core.mixins import HtmxRedirectMixin
+from config.core.mixins import HtmxRedirectMixin, PinPrimaryAfterWriteMixin
+from config.core.ratelimit import RateLimitMixin
 from .models import User
 from .forms import (
     UserRegisterForm,
@@ -54,7 +55,7 @@ class UserRegisterViews(CreateView):
         return super().form_valid(form)
 
 
-class UserLoginView(LoginView):
+class UserLoginView(RateLimitMixin, LoginView):
     """
     Вход пользователя.
     Аутентифицирует пользователя и перенаправляет в профиль при успешном входе.
@@ -62,6 +63,7 @@ class UserLoginView(LoginView):
 
     form_class = UserLoginForm
     template_name = "users/login.html"
+    ratelimit_group = "login"
     redirect_authenticated_user = True  # Перенаправляет авторизованного пользователя. Что бы не регистрировался заново.
     extra_context = {
         "title": "Авторизация пользователя",
@@ -91,7 +93,9 @@ class UserProfileView(LoginRequiredMixin, DetailView):
         return self.request.user
 
 
-class UserUpdateView(LoginRequiredMixin, HtmxRedirectMixin, UpdateView):
+class UserUpdateView(
+    LoginRequiredMixin, PinPrimaryAfterWriteMixin, HtmxRedirectMixin, UpdateView
+):
     """
     Обновление данных пользователя.
     Позволяет обновить профиль, включая фото.
@@ -110,11 +114,11 @@ class UserUpdateView(LoginRequiredMixin, HtmxRedirectMixin, UpdateView):
         return self.request.user
 
     def form_valid(self, form):
-        form.save()
+        response = super().form_valid(form)
         logger_auth.info(
             f"Пользователь {form.cleaned_data.get("email")} изменил свои данные."
         )
-        return super().form_valid(form)
+        return response
 
 
 class UserPasswordChangeView(LoginRequiredMixin, HtmxRedirectMixin, PasswordChangeView):
@@ -156,7 +160,7 @@ def reset_password_success(request):
     )
 
 
-class UserResetPasswordView(FormView):
+class UserResetPasswordView(RateLimitMixin, FormView):
     """
     Восстановление пароля.
     Перенаправление на страницу с подтверждением.
@@ -164,6 +168,10 @@ class UserResetPasswordView(FormView):
 
     form_class = UserEmailExistsForm
     template_name = "users/reset-password.html"
+    ratelimit_group = "reset_password"
+    # Новый пароль и письмо владельцу адреса — лимит на аккаунт, а не на IP:
+    # смена IP не должна давать новых попыток.
+    ratelimit_field_by_ip = False
     success_url = reverse_lazy("users:reset-password-success")
     extra_context = {
         "title": "Восстановление пароля",
@@ -171,7 +179,7 @@ class UserResetPasswordView(FormView):
 
     def form_valid(self, form):
         email = form.cleaned_data["email"]
-        user = User.objects.get(email=email)
+        user = User.objects.get(email__lower=email)
         new_password = "".join(
             random.sample((string.ascii_letters + string.digits), 12)
         )